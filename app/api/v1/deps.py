@@ -65,7 +65,7 @@ def get_question_service(
 def get_matching_service(
     db: Session = Depends(get_db)
 ) -> ExpertMatchingService:
-    return ExpertMatchingService(db)
+    return ExpertMatchingService()
 
 
 async def get_ws_current_user(
@@ -1,7 +1,12 @@
 # routers/expert.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session as DBSession
-from app.api.v1.deps import get_db
+from app.api.v1.deps import get_db, get_current_expert
+from app.schemas.expert import ExpertDashboardStats, ExpertAvailabilityCreate, ExpertAvailabilityResponse
+from app.models.expert import ExpertProfile, ExpertAvailability
+from app.services.availability import availability_index, to_utc_week_intervals
+from datetime import datetime, timezone
+from app.services.expert_stats import ExpertStatsService
 from app.models.user import User
 from typing import List
 import random
@@ -33,4 +38,55 @@ async def get_test_experts(db: DBSession = Depends(get_db)):
             "responseTime": "< 1 hour",
         }
         for expert in test_experts
-    ]
\ No newline at end of file
+    ]
+
+@router.get("/me/dashboard", response_model=ExpertDashboardStats)
+async def get_dashboard_stats(
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(get_current_expert)
+):
+    """Dashboard counters for the current expert"""
+    return ExpertStatsService(db).get_dashboard(current_user.id)
+
+
+@router.put("/me/availability", response_model=List[ExpertAvailabilityResponse])
+async def set_availability(
+    slots: List[ExpertAvailabilityCreate],
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(get_current_expert)
+):
+    """Replace the current expert's weekly availability schedule"""
+    profile = db.query(ExpertProfile).filter(ExpertProfile.user_id == current_user.id).first()
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expert profile not found"
+        )
+
+    now = datetime.now(timezone.utc)
+    for slot in slots:
+        try:
+            to_utc_week_intervals(slot.day_of_week, slot.start_time, slot.end_time, slot.timezone, now)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid availability window: {slot.start_time}-{slot.end_time} {slot.timezone}"
+            )
+
+    db.query(ExpertAvailability).filter(ExpertAvailability.expert_id == profile.id).delete()
+    rows = [ExpertAvailability(expert_id=profile.id, **slot.model_dump()) for slot in slots]
+    db.add_all(rows)
+    db.commit()
+    availability_index.invalidate()
+
+    return [
+        ExpertAvailabilityResponse(
+            id=row.id,
+            expert_id=row.expert_id,
+            day_of_week=row.day_of_week,
+            start_time=row.start_time,
+            end_time=row.end_time,
+            timezone=row.timezone
+        )
+        for row in rows
+    ]
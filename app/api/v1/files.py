@@ -0,0 +1,61 @@
+# routers/files.py
+import mimetypes
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.utils.file_storage import LocalStorage, UploadTooLargeError, get_storage
+
+router = APIRouter()
+
+
+def _local_storage() -> LocalStorage:
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="File not found")
+    return storage
+
+
+@router.get("/{file_name:path}")
+async def download_file(
+    file_name: str,
+    expires: int = Query(...),
+    signature: str = Query(...)
+):
+    """Serve a file through a URL signed by LocalStorage.get_download_url"""
+    storage = _local_storage()
+    if not storage.verify("GET", file_name, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    try:
+        found = await storage.exists(file_name)
+    except ValueError:
+        found = False
+    if not found:
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    return StreamingResponse(storage.iter_file(file_name), media_type=media_type)
+
+
+@router.put("/{file_name:path}")
+async def upload_file(
+    file_name: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    max_bytes: Optional[int] = Query(None)
+):
+    """Accept a direct upload through a URL signed by LocalStorage.create_upload"""
+    storage = _local_storage()
+    if not storage.verify("PUT", file_name, expires, signature, max_bytes):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    content_length = request.headers.get("content-length")
+    if max_bytes and content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+    try:
+        await storage.receive_upload(file_name, request.stream(), max_bytes)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="File not found")
+    return Response(status_code=200)
@@ -0,0 +1,70 @@
+# routers/notification.py
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+from app.api.v1.deps import get_db, get_current_user, get_ws_current_user
+from app.schemas.notification import NotificationResponse, NotificationPage, UnreadCount
+from app.services.notification import NotificationService, notification_hub
+from app.models.user import User
+
+router = APIRouter(tags=["notifications"])
+
+@router.get("", response_model=NotificationPage)
+async def get_notifications(
+    unread_only: bool = Query(False),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Poll for notifications, newest first; also how offline users catch up"""
+    try:
+        return await NotificationService().get_user_notifications(
+            db, current_user.id, unread_only=unread_only, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def get_unread_count(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Badge count; a single primary-key read"""
+    return UnreadCount(unread=await NotificationService().get_unread_count(db, current_user.id))
+
+@router.put("/read-all")
+async def mark_all_notifications_read(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    updated = await NotificationService().mark_all_read(db, current_user.id)
+    return {"status": "success", "updated": updated}
+
+@router.put("/{notification_id}/read", response_model=NotificationResponse)
+async def mark_notification_read(
+    notification_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    notification = await NotificationService().mark_as_read(db, notification_id, current_user.id)
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return notification
+
+@router.websocket("/ws")
+async def notifications_websocket(
+    websocket: WebSocket,
+    current_user: User = Depends(get_ws_current_user)
+):
+    """Per-user channel; new notifications are pushed as they are created"""
+    await notification_hub.connect(current_user.id, websocket)
+    try:
+        while True:
+            await websocket.receive_text()  # Keep-alive; clients do not send anything meaningful
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Also on errors other than a clean disconnect, so dead sockets never linger
+        notification_hub.disconnect(current_user.id, websocket)
@@ -1,14 +1,23 @@
 # routers/questions.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.api.v1.deps import get_db, get_current_user
 from app.schemas.question import *
 from app.services.question import QuestionService
-from app.services.ai_service import AIService
+from app.services.ai_service import AIResponse, get_ai_service
 from app.services.matching import ExpertMatchingService
+from app.services.job_queue import job_queue
+from app.services.tasks import questions_verified_key
+from app.services.search import QuestionSearchService
+from app.services.dedup import question_dedup
+from app.core.metrics import metrics
 from app.schemas.user import User
+from app.models.question import Question
 
-import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 @router.post("/analyze", response_model=QuestionAnalysis)
@@ -21,20 +30,61 @@ async def analyze_question(
     Analyze the question and return suggestions.
     This doesn't save to database, just returns analysis results.
     """
-    try:
-        ai_service = AIService()
-        
-        # Get AI analysis including potential breakdowns/rephrasing
-        analysis = json.loads(await ai_service.analyze_question(question.content))
-        
-        return QuestionAnalysis(
-            original_content=question.content,
-            rephrased_versions=analysis['suggested_questions'],
-            reasoning=analysis['reason'],
-        )
-    except Exception as e:
-        # Redirect to an error page on the frontend
-        return
+    # A near-identical resubmission reuses the earlier analysis, or points at the question
+    # already verified, instead of calling the LLM; refinements within a conversation
+    # always go to the model
+    if not question.conversation_id:
+        duplicate = question_dedup.find(question.content, client_id=str(current_user.id))
+        if duplicate:
+            _, _, payload = duplicate
+            metrics.incr("question_analysis_dedup_hits", kind=payload["kind"])
+            if payload["kind"] == "question":
+                existing = db.query(Question).filter(
+                    Question.id == payload["question_id"],
+                    Question.client_id == current_user.id
+                ).first()
+                if existing is not None:
+                    return QuestionAnalysis(
+                        original_content=question.content,
+                        rephrased_versions=[existing.content],
+                        reasoning="This question matches one you have already submitted.",
+                        duplicate_of=str(existing.id),
+                    )
+            else:
+                analysis = AIResponse(**payload["analysis"])
+                return QuestionAnalysis(
+                    original_content=question.content,
+                    rephrased_versions=analysis.suggested_questions,
+                    reasoning=analysis.reason,
+                    conversation_id=payload["conversation_id"],
+                )
+
+    ai_service = get_ai_service()
+    conversation_id = question.conversation_id or str(uuid.uuid4())
+
+    # Get AI analysis including potential breakdowns/rephrasing
+    analysis = await ai_service.analyze_question(
+        question.content,
+        # Scope history to the caller so conversation ids cannot be shared across users
+        conversation_id=f"{current_user.id}:{conversation_id}"
+    )
+    question_dedup.add(
+        f"analysis:{conversation_id}",
+        question.content,
+        {
+            "kind": "analysis",
+            "client_id": str(current_user.id),
+            "conversation_id": conversation_id,
+            "analysis": analysis.model_dump()
+        }
+    )
+
+    return QuestionAnalysis(
+        original_content=question.content,
+        rephrased_versions=analysis.suggested_questions,
+        reasoning=analysis.reason,
+        conversation_id=conversation_id,
+    )
 
 @router.post("/verify", response_model=List[str])
 async def save_verified_questions(
@@ -46,10 +96,48 @@ async def save_verified_questions(
         """Save verified questions to database efficiently"""
         question_service = QuestionService(db)
         #breakpoint()
-        return await question_service.bulk_create_questions(
+        created = await question_service.bulk_create_questions(
             client_id=current_user.id,
             final_content=verified_data.verified_questions
         )
+
+        # Matching, notifications and emails run on the job queue, not in the request.
+        # Keyed on the saved rows, so re-verifying the same texts later still gets a job
+        question_ids = [str(q.id) for q in created]
+        job_queue.enqueue(
+            db,
+            "question.verified",
+            {"client_id": str(current_user.id), "questions": question_ids},
+            idempotency_key=questions_verified_key(question_ids)
+        )
+        db.commit()
+
+        for q in created:
+            question_dedup.add(
+                f"question:{q.id}",
+                q.content,
+                {"kind": "question", "client_id": str(current_user.id), "question_id": str(q.id)}
+            )
+        return [q.content for q in created]
+    except HTTPException:
+        raise
     except Exception as e:
-        # Redirect to an error page on the frontend
-        return
+        db.rollback()
+        logger.error(f"Failed to save verified questions: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to save verified questions")
+
+@router.get("/search", response_model=QuestionSearchPage)
+async def search_questions(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ranked full-text search over the current user's questions"""
+    return QuestionSearchService(db).search(
+        client_id=current_user.id,
+        query=q,
+        page=page,
+        page_size=page_size
+    )
@@ -2,12 +2,21 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPExce
 from sqlalchemy.orm import Session as SQLAlchemySession
 from typing import List
 from datetime import datetime
-from app.api.v1.deps import get_db, get_current_user, get_ws_current_user
-from app.schemas.session import SessionResponse, MessageResponse, CreateSession
+from app.api.v1.deps import get_db, get_current_user, get_ws_current_user, get_matching_service
+from app.schemas.session import SessionResponse, MessageResponse, CreateSession, SessionRating, AttachmentUploadRequest, AttachmentUpload, AttachmentURL
 from app.schemas.user import User
 from uuid import UUID
 from app.models.session import SessionModel, MessageModel
+from app.models.expert import ExpertProfile
+from app.models.question import Question
+from app.services.expert_stats import ExpertStatsService
+from app.services.assignment import expert_assigner, expert_load
+from app.services.matching import ExpertMatchingService
 from typing import Optional
+from app.utils.file_storage import get_storage
+from app.core.config import settings
+import os
+import uuid
 
 router = APIRouter(tags=["sessions"])
 
@@ -16,18 +25,42 @@ router = APIRouter(tags=["sessions"])
 async def create_session(
     data: CreateSession,
     current_user: User = Depends(get_current_user),
-    db: SQLAlchemySession = Depends(get_db)
+    db: SQLAlchemySession = Depends(get_db),
+    matching_service: ExpertMatchingService = Depends(get_matching_service)
 ):
     """Create a new session with initial message"""
+    expert_id = data.expert_id
+    if expert_id is None:
+        if data.question_id is None:
+            raise HTTPException(status_code=422, detail="expert_id or question_id is required")
+        question = db.query(Question).filter(Question.id == data.question_id).first()
+        if not question:
+            raise HTTPException(status_code=404, detail="Question not found")
+        if str(question.client_id) != str(current_user.id):
+            raise HTTPException(status_code=403, detail="Not authorized")
+        match = await expert_assigner.assign(
+            db,
+            question.id,
+            matching_service,
+            available_within_hours=settings.SESSION_AVAILABLE_WITHIN_HOURS
+        )
+        if match is None:
+            raise HTTPException(status_code=503, detail="No expert is available right now")
+        expert_id = match['expert'].user_id
+
     try:
         # Create session
         session = SessionModel(
             user_id=current_user.id,
-            expert_id=data.expert_id,
+            expert_id=expert_id,
             status="active"
         )
         db.add(session)
+        if data.expert_id is not None:
+            # Assigned experts were already counted when their slot was reserved
+            ExpertStatsService(db).session_opened(expert_id)
         db.commit()
+        expert_load.session_opened(expert_id)
         
         # Add initial message
         message = MessageModel(
@@ -132,12 +165,93 @@ async def close_session(
     if str(session.user_id) != str(current_user.id) and str(session.expert_id) != str(current_user.id):
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    session.status = "completed"
-    session.ended_at = datetime.utcnow()
-    db.commit()
+    if session.status == "active":
+        session.status = "completed"
+        session.ended_at = datetime.utcnow()
+        hourly_rate = db.query(ExpertProfile.hourly_rate).filter(
+            ExpertProfile.user_id == session.expert_id
+        ).scalar()
+        session.earnings = ExpertStatsService.session_earnings(
+            session.created_at,
+            session.ended_at,
+            hourly_rate
+        )
+        ExpertStatsService(db).session_closed(session.expert_id, session.earnings)
+        db.commit()
+        expert_load.session_closed(session.expert_id)
     
     return {"status": "success"}
 
+@router.post("/{session_id}/rating")
+async def rate_session(
+    session_id: UUID,
+    data: SessionRating,
+    current_user: User = Depends(get_current_user),
+    db: SQLAlchemySession = Depends(get_db)
+):
+    """Client rates a completed session once"""
+    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    if str(session.user_id) != str(current_user.id):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if session.status != "completed":
+        raise HTTPException(status_code=400, detail="Only completed sessions can be rated")
+
+    # Conditional update so concurrent submissions cannot both count
+    rated = db.query(SessionModel).filter(
+        SessionModel.id == session_id,
+        SessionModel.rating.is_(None)
+    ).update({SessionModel.rating: data.rating}, synchronize_session=False)
+    if not rated:
+        raise HTTPException(status_code=409, detail="Session already rated")
+
+    ExpertStatsService(db).record_rating(session.expert_id, data.rating)
+    db.commit()
+    return {"status": "success"}
+
+# Attachments: clients upload and download directly against storage
+def _get_participant_session(db: SQLAlchemySession, session_id: UUID, user_id) -> SessionModel:
+    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if str(session.user_id) != str(user_id) and str(session.expert_id) != str(user_id):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return session
+
+@router.post("/{session_id}/attachments", response_model=AttachmentUpload)
+async def create_attachment_upload(
+    session_id: UUID,
+    data: AttachmentUploadRequest,
+    current_user: User = Depends(get_current_user),
+    db: SQLAlchemySession = Depends(get_db)
+):
+    """Presigned upload for a new attachment; the file never passes through the API"""
+    _get_participant_session(db, session_id, current_user.id)
+    key = f"sessions/{session_id}/{uuid.uuid4()}/{os.path.basename(data.file_name) or 'file'}"
+    upload = await get_storage().create_upload(
+        key,
+        content_type=data.content_type,
+        max_bytes=settings.ATTACHMENT_MAX_BYTES,
+        expires_in=settings.PRESIGNED_UPLOAD_EXPIRES_SECONDS
+    )
+    return AttachmentUpload(key=key, **upload)
+
+@router.get("/{session_id}/attachments/url", response_model=AttachmentURL)
+async def get_attachment_url(
+    session_id: UUID,
+    key: str = Query(...),
+    current_user: User = Depends(get_current_user),
+    db: SQLAlchemySession = Depends(get_db)
+):
+    """Presigned download URL, shared by all requests for the same object in an expiry window"""
+    _get_participant_session(db, session_id, current_user.id)
+    if not key.startswith(f"sessions/{session_id}/") or ".." in key.split("/"):
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    return AttachmentURL(url=await get_storage().get_download_url(key))
+
 # WebSocket Chat
 class ConnectionManager:
     def __init__(self):
@@ -17,6 +17,18 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 1
+
+    # Content encryption (Fernet-format master key wrapping per-record data keys)
+    ENCRYPTION_MASTER_KEY: str = ""
+    # For rotation: "key_id:fernet_key,..." with the active key first; overrides ENCRYPTION_MASTER_KEY
+    ENCRYPTION_MASTER_KEYS: str = ""
+    ENCRYPTION_CHUNK_SIZE: int = 64 * 1024
+    ENCRYPTION_KEY_CACHE_SIZE: int = 10000
+    ENCRYPTION_KEY_CACHE_TTL_SECONDS: int = 300
+
+    # Bounded thread pool for bcrypt and encryption
+    CRYPTO_EXECUTOR_WORKERS: int = 4
+    CRYPTO_EXECUTOR_MAX_QUEUE: int = 256
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["https://king-prawn-app-df8b7.ondigitalocean.app"]  # Frontend URL
@@ -38,9 +50,50 @@ class Settings(BaseSettings):
     LINKEDIN_CLIENT_ID: str
     LINKEDIN_CLIENT_SECRET: str
     LINKEDIN_REDIRECT_URI: str
+    OAUTH_METADATA_REFRESH_SECONDS: int = 3600
+    OAUTH_MIN_REFRESH_SECONDS: int = 60
+    OAUTH_CLOCK_SKEW_SECONDS: int = 60
+    OAUTH_HTTP_TIMEOUT_SECONDS: float = 10.0
     
     # OpenAI
     OPENAI_API_KEY: str
+
+    # File storage ("s3" or "local")
+    STORAGE_BACKEND: str = "s3"
+    AWS_ACCESS_KEY_ID: Optional[str] = None
+    AWS_SECRET_ACCESS_KEY: Optional[str] = None
+    AWS_REGION: str = "us-east-1"
+    S3_BUCKET: str = ""
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # S3 minimum is 5 MiB
+    S3_MAX_CONCURRENCY: int = 4
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    LOCAL_STORAGE_PATH: str = "./storage"
+    LOCAL_STORAGE_URL: str = "/files"
+    PRESIGNED_UPLOAD_EXPIRES_SECONDS: int = 900
+    PRESIGNED_URL_BUCKET_SECONDS: int = 300
+    PRESIGNED_URL_CACHE_SIZE: int = 10000
+    ATTACHMENT_MAX_BYTES: int = 25 * 1024 * 1024
+
+    # LLM prompt budget
+    LLM_MAX_INPUT_TOKENS: int = 4000
+    LLM_MAX_OUTPUT_TOKENS: int = 1000
+    LLM_IMAGE_MAX_BYTES: int = 512 * 1024
+    LLM_IMAGE_MAX_SIDE: int = 1568
+
+    # LLM routing and circuit breaking
+    LLM_PRIMARY_MODEL: str = "gpt-4o-mini-2024-07-18"
+    LLM_FALLBACK_MODELS: List[str] = ["gpt-4o-2024-08-06", "claude-3-5-sonnet-20241022"]
+    LLM_TIMEOUT_SECONDS: float = 20.0
+    LLM_BREAKER_FAILURE_RATE: float = 0.5
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    LLM_BREAKER_WINDOW_SIZE: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_OPEN_SECONDS: float = 30.0
+
+    # LLM conversation history
+    CONVERSATION_TTL_SECONDS: int = 3600
+    CONVERSATION_MAX_ENTRIES: int = 10000
+    CONVERSATION_MAX_HISTORY_TOKENS: int = 2000
     
     # Redis
     REDIS_HOST: str = ""
@@ -48,6 +101,44 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DB: int = 0
     
+    # Near-duplicate question detection
+    DEDUP_NUM_PERM: int = 128
+    DEDUP_BANDS: int = 32
+    DEDUP_THRESHOLD: float = 0.85
+    DEDUP_MAX_ENTRIES: int = 200000
+
+    # Background jobs
+    JOB_QUEUE_WORKERS: int = 2
+    JOB_QUEUE_POLL_SECONDS: float = 1.0
+    JOB_QUEUE_VISIBILITY_TIMEOUT_SECONDS: int = 300
+    JOB_QUEUE_MAX_ATTEMPTS: int = 5
+    JOB_QUEUE_BACKOFF_SECONDS: float = 5.0
+
+    # Expert availability
+    AVAILABILITY_INDEX_TTL_SECONDS: int = 300
+    # Experts who publish hours are only matched when free within these windows; None disables the filter
+    SESSION_AVAILABLE_WITHIN_HOURS: Optional[float] = 1
+    MATCH_REQUEST_AVAILABLE_WITHIN_HOURS: Optional[float] = 48
+
+    # Expert dashboard
+    EXPERT_STATS_RECONCILE_SECONDS: int = 3600
+    MATCH_REQUESTS_PER_QUESTION: int = 3  # Top-ranked experts offered each verified question
+
+    # Expert assignment
+    EXPERT_MAX_ACTIVE_SESSIONS: int = 5
+    ASSIGNMENT_TOP_CANDIDATES: int = 5
+    EXPERT_LOAD_REFRESH_SECONDS: int = 30
+
+    # Background checks
+    BACKGROUND_CHECK_API_URL: str = ""
+    BACKGROUND_CHECK_API_KEY: str = ""
+    BACKGROUND_CHECK_TIMEOUT_SECONDS: float = 10.0
+    BACKGROUND_CHECK_MAX_CONNECTIONS: int = 20
+    BACKGROUND_CHECK_CONCURRENCY: int = 10
+    BACKGROUND_CHECK_BATCH_SIZE: int = 200
+    BACKGROUND_CHECK_POLL_MIN_SECONDS: int = 60
+    BACKGROUND_CHECK_POLL_MAX_SECONDS: int = 3600
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
     
@@ -59,6 +150,12 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     EMAILS_FROM_EMAIL: Optional[str] = None
     EMAILS_FROM_NAME: Optional[str] = None
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    EMAIL_POOL_SIZE: int = 4
+    EMAIL_BATCH_SIZE: int = 100  # Messages sent per connection checkout
+    EMAIL_CONNECTION_MAX_MESSAGES: int = 1000  # Reconnect after this many (server limits)
+    EMAIL_MAX_RETRIES: int = 3
+    EMAIL_BACKOFF_SECONDS: float = 1.0
     
     # Session
     SESSION_COOKIE_NAME: str = "refresh_token"
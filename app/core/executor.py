@@ -0,0 +1,110 @@
+# core/executor.py
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool for CPU-heavy calls (bcrypt, encryption), so they run
+    neither on the event loop nor in the default threadpool that serves
+    blocking DB work. At most max_workers + max_queue calls, async or sync, are
+    admitted at once; further callers wait their turn. Queue depth (admitted or
+    waiting, not yet running), active workers and wait/run times go to metrics.
+    """
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        # Thread-safe so sync submitters and async callers share one bound
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+
+    def _adjust(self, queued: int = 0, active: int = 0):
+        with self._lock:
+            self._queued += queued
+            self._active += active
+            queue_depth, active_workers = self._queued, self._active
+        metrics.set_gauge("executor_queue_depth", queue_depth, executor=self.name)
+        metrics.set_gauge("executor_active", active_workers, executor=self.name)
+
+    def _instrumented(self, func: Callable[..., T], submitted: float) -> Callable[..., T]:
+        def call(*args, **kwargs) -> T:
+            started = time.perf_counter()
+            self._adjust(queued=-1, active=1)
+            metrics.observe("executor_wait_seconds", started - submitted, executor=self.name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe("executor_run_seconds", time.perf_counter() - started, executor=self.name)
+                self._adjust(active=-1)
+        return call
+
+    def _submit_admitted(self, func: Callable[..., T], args: tuple, submitted: float) -> "Future[T]":
+        """Hand an admitted call to the pool; its slot is released when the future settles"""
+        def settled(future: Future):
+            self._slots.release()
+            if future.cancelled():
+                self._adjust(queued=-1)
+
+        try:
+            future = self._pool.submit(self._instrumented(func, submitted), *args)
+        except BaseException:
+            self._slots.release()
+            self._adjust(queued=-1)
+            raise
+        future.add_done_callback(settled)
+        return future
+
+    async def _acquire_async(self):
+        # Waiting on the thread semaphore would block the loop; poll it with a short backoff
+        delay = 0.001
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def submit(self, func: Callable[..., T], *args: Any) -> "Future[T]":
+        """Blocking admission for synchronous callers; returns the pool's future"""
+        submitted = time.perf_counter()
+        self._adjust(queued=1)
+        self._slots.acquire()
+        return self._submit_admitted(func, args, submitted)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run func(*args) on the pool without blocking the event loop"""
+        submitted = time.perf_counter()
+        self._adjust(queued=1)
+        try:
+            await self._acquire_async()
+        except BaseException:
+            self._adjust(queued=-1)
+            raise
+        return await asyncio.wrap_future(self._submit_admitted(func, args, submitted))
+
+    def map(self, func: Callable[..., T], items: Iterable[Any]) -> List[T]:
+        """
+        Blocking map for synchronous callers, admitted item by item through
+        submit. Must not be called from inside a task already running on this pool.
+        """
+        futures = [self.submit(func, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+crypto_executor = BoundedExecutor(
+    "crypto",
+    max_workers=settings.CRYPTO_EXECUTOR_WORKERS,
+    max_queue=settings.CRYPTO_EXECUTOR_MAX_QUEUE
+)
@@ -0,0 +1,54 @@
+# core/metrics.py
+import threading
+from collections import defaultdict
+from typing import Dict, Any
+
+class Metrics:
+    """Process-local counters, gauges and timing summaries"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> str:
+        if not labels:
+            return name
+        label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        return f"{name}{{{label_str}}}"
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """Increment a counter"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] += value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set a gauge to its current value"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation (e.g. a latency) into a count/sum/max summary"""
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of all current values"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {k: dict(v) for k, v in self._summaries.items()},
+            }
+
+# Create a single instance to be used throughout the app
+metrics = Metrics()
+
+__all__ = ["metrics", "Metrics"]
@@ -4,6 +4,7 @@ from typing import Any, Union, Optional
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.core.config import settings  # Import settings instance directly
+from app.core.executor import crypto_executor
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -19,6 +20,15 @@ class SecurityManager:
     def get_password_hash(password: str) -> str:
         return pwd_context.hash(password)
 
+    # bcrypt is deliberately slow; async code paths must use these
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await crypto_executor.run(pwd_context.verify, plain_password, hashed_password)
+
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        return await crypto_executor.run(pwd_context.hash, password)
+
     def create_access_token(
         self, subject: Union[str, Any], expires_delta: Optional[timedelta] = None
     ) -> str:
@@ -1,8 +1,11 @@
 from app.models.base_models import Base
 from app.models.user import User
-from app.models.notification import Notification
-from app.models.expert import ExpertProfile
-from app.models.question import Question
+from app.models.notification import Notification, NotificationCounter
+from app.models.expert import ExpertProfile, ExpertAvailability
+from app.models.question import Question, ExpertResponse
+from app.models.job import Job
+from app.models.expert_stats import ExpertStats
+from app.models.match_request import MatchRequest
 
 # This ensures all models are registered
-__all__ = ['Base', 'User', 'Notification', 'ExpertProfile', 'Question']
\ No newline at end of file
+__all__ = ['Base', 'User', 'Notification', 'NotificationCounter', 'ExpertProfile', 'ExpertAvailability', 'Question', 'ExpertResponse', 'Job', 'ExpertStats', 'MatchRequest']
\ No newline at end of file
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, ForeignKey, String, JSON, Float, Integer, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, ForeignKey, String, JSON, Float, Integer, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 from app.models.base_models import Base
 import uuid
@@ -10,17 +10,48 @@ class ExpertProfile(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
-    expertise = Column(JSON)  # List of expertise areas
+    # Lowercased expertise tags; GIN-indexed so tag overlap (&&) is an index lookup.
+    # JSON on SQLite so the model still works in local tests
+    expertise = Column(ARRAY(String).with_variant(JSON(), "sqlite"))
+    expertise_weights = Column(JSON, default=dict)  # Optional per-tag weight, e.g. {"fintech": 2.0}
     linkedin_id = Column(String, unique=True, nullable=True)
     bio = Column(String)
     verification_status = Column(String)  # pending, verified, rejected
     background_check_status = Column(String)  # pending, passed, failed
+    background_check_id = Column(String, nullable=True)  # Provider's check id
+    background_check_started_at = Column(DateTime, nullable=True)
+    background_check_next_poll_at = Column(DateTime, nullable=True)
     hourly_rate = Column(Float)
     rating = Column(Float, default=0.0)
     total_questions = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        Index("ix_expert_profiles_expertise", "expertise", postgresql_using="gin"),
+        # One profile per user; also the conflict target for the login upsert
+        Index("ux_expert_profiles_user_id", "user_id", unique=True),
+        # Only pending checks are ever polled
+        Index(
+            "ix_expert_profiles_background_check_due",
+            "background_check_next_poll_at",
+            postgresql_where=text("background_check_status = 'pending'")
+        ),
+    )
+
     # Relationships
     user = relationship("User", back_populates="expert_profile")
-    #responses = relationship("ExpertResponse", back_populates="expert")
\ No newline at end of file
+    availability = relationship("ExpertAvailability", back_populates="expert", cascade="all, delete-orphan")
+    #responses = relationship("ExpertResponse", back_populates="expert")
+
+class ExpertAvailability(Base):
+    __tablename__ = "expert_availability"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    expert_id = Column(UUID(as_uuid=True), ForeignKey("expert_profiles.id"), nullable=False, index=True)
+    day_of_week = Column(Integer, nullable=False)  # 0 = Monday
+    start_time = Column(String, nullable=False)  # HH:MM, local to timezone
+    end_time = Column(String, nullable=False)  # HH:MM; earlier than start_time means overnight
+    timezone = Column(String, nullable=False)  # IANA name, e.g. Europe/Berlin
+
+    expert = relationship("ExpertProfile", back_populates="availability")
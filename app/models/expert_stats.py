@@ -0,0 +1,19 @@
+# models/expert_stats.py
+from sqlalchemy import Column, ForeignKey, Integer, Float, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.models.base_models import Base
+
+class ExpertStats(Base):
+    """Per-expert dashboard counters, maintained incrementally and reconciled periodically"""
+    __tablename__ = "expert_stats"
+
+    expert_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    total_questions_answered = Column(Integer, nullable=False, default=0)
+    average_rating = Column(Float, nullable=False, default=0.0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    total_earnings = Column(Float, nullable=False, default=0.0)
+    current_match_requests = Column(Integer, nullable=False, default=0)
+    active_sessions = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
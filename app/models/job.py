@@ -0,0 +1,26 @@
+# models/job.py
+from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.models.base_models import Base, TimeStampMixin
+
+class Job(Base, TimeStampMixin):
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    task = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)  # Visibility timeout for running jobs
+    idempotency_key = Column(String, unique=True, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Workers poll by (status, run_at)
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
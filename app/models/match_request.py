@@ -0,0 +1,22 @@
+# models/match_request.py
+from sqlalchemy import Column, ForeignKey, String, DateTime, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.models.base_models import Base
+
+class MatchRequest(Base):
+    """A question offered to a matched expert, open until the expert responds"""
+    __tablename__ = "match_requests"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False)
+    expert_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending")  # pending, answered
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("question_id", "expert_id", name="uq_match_requests_question_expert"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, String, Boolean, DateTime, Text
+from sqlalchemy import Column, ForeignKey, String, Boolean, DateTime, Text, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -7,6 +7,10 @@ from app.models.base_models import Base, TimeStampMixin
 
 class Notification(Base, TimeStampMixin):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Serves the feed (keyset on created_at per user) and unread filtering
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
@@ -16,4 +20,12 @@ class Notification(Base, TimeStampMixin):
     is_read = Column(Boolean, default=False)
     
     # Define the relationship using backref
-    user = relationship("User", back_populates="notifications")
\ No newline at end of file
+    user = relationship("User", back_populates="notifications")
+
+class NotificationCounter(Base):
+    """Unread notification count per user, kept in step with notification writes"""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
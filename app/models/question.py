@@ -1,5 +1,5 @@
 # models/question.py
-from sqlalchemy import Column, String, Enum, ForeignKey, JSON, Float, DateTime
+from sqlalchemy import Column, String, Enum, ForeignKey, JSON, Float, DateTime, Text, LargeBinary, DDL, event
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 from app.models.base_models import Base, TimeStampMixin
@@ -17,3 +17,29 @@ class Question(Base, TimeStampMixin):
     
     # Self-referential relationship for breakdown questions
     client = relationship("User", back_populates="questions")
+
+
+class ExpertResponse(Base, TimeStampMixin):
+    __tablename__ = "expert_responses"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False, index=True)
+    expert_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    test_response = Column(Text)
+    main_response_encrypted = Column(LargeBinary)  # Chunked AES-GCM stream (see EncryptionService)
+    encryption_key_encrypted = Column(LargeBinary)
+    status = Column(String, default="pending")  # pending, accepted, rejected
+
+# Full-text and trigram search indexes are Postgres-only; created alongside the table
+# (see migrations/0001_question_search.sql for existing databases)
+event.listen(
+    Question.__table__,
+    "after_create",
+    DDL("""
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        ALTER TABLE questions ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+        CREATE INDEX ix_questions_search_vector ON questions USING gin (search_vector);
+        CREATE INDEX ix_questions_content_trgm ON questions USING gin (content gin_trgm_ops);
+    """).execute_if(dialect="postgresql")
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, String, DateTime, Text
+from sqlalchemy import Column, ForeignKey, String, DateTime, Text, Float
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -15,6 +15,8 @@ class SessionModel(Base):
     status = Column(String, default="active")  # active, completed
     created_at = Column(DateTime, default=datetime.utcnow)
     ended_at = Column(DateTime, nullable=True)
+    earnings = Column(Float, nullable=True)  # Fixed at close, at the expert's rate then
+    rating = Column(Float, nullable=True)  # Client's 1-5 rating of a completed session
 
     # Relationships
     messages = relationship("MessageModel", back_populates="session", cascade="all, delete-orphan")
@@ -0,0 +1,31 @@
+# app/schemas/notification.py
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+import uuid
+
+class NotificationCreate(BaseModel):
+    user_id: uuid.UUID
+    title: str
+    content: str
+    type: str
+    # Fixed id for idempotent writes; a notification whose id already exists is skipped
+    id: Optional[uuid.UUID] = None
+
+class NotificationResponse(BaseModel):
+    id: uuid.UUID
+    title: str
+    content: str
+    type: str
+    is_read: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class NotificationPage(BaseModel):
+    items: List[NotificationResponse]
+    next_cursor: Optional[str] = None
+
+class UnreadCount(BaseModel):
+    unread: int
@@ -12,6 +12,7 @@ class QuestionStatus(str, Enum):
 
 class QuestionAnalyzeRequest(BaseModel):
     content: str
+    conversation_id: Optional[str] = None  # Set to refine a previous analysis
 
 # Request Schemas
 class QuestionCreate(BaseModel):
@@ -27,12 +28,19 @@ class QuestionAnalysis(BaseModel):
     original_content: str
     rephrased_versions: List[str]
     reasoning: str
+    conversation_id: Optional[str] = None
+    duplicate_of: Optional[str] = None
 
 class VerifyQuestionsRequest(BaseModel):
     original_content: str
     verified_questions: List[str]
 
 
+class QuestionCreated(BaseModel):
+    id: UUID4
+    content: str
+    created_at: datetime
+
 class QuestionResponse(BaseModel):
     id: UUID4
     client_id: UUID4
@@ -42,3 +50,16 @@ class QuestionResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class QuestionSearchResult(BaseModel):
+    id: UUID4
+    content: str
+    created_at: datetime
+    rank: float
+
+class QuestionSearchPage(BaseModel):
+    items: List[QuestionSearchResult]
+    page: int
+    page_size: int
+    has_more: bool
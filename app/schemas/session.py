@@ -4,9 +4,11 @@ from datetime import datetime
 from enum import Enum
 from uuid import UUID
 
+
 class MessageCreate(BaseModel):
     content: str
 
+
 class MessageResponse(BaseModel):
     id: UUID
     content: str
@@ -16,10 +18,17 @@ class MessageResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
 class CreateSession(BaseModel):
-    expert_id: UUID
+    expert_id: Optional[UUID] = None
+    question_id: Optional[UUID] = None  # Assign an expert for this question when expert_id is omitted
     initial_message: str
 
+
+class SessionRating(BaseModel):
+    rating: float = Field(..., ge=1, le=5)
+
+
 class SessionResponse(BaseModel):
     id: UUID
     user_id: UUID
@@ -30,4 +39,20 @@ class SessionResponse(BaseModel):
     messages: List[MessageResponse]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class AttachmentUploadRequest(BaseModel):
+    file_name: str
+    content_type: Optional[str] = None
+
+
+class AttachmentUpload(BaseModel):
+    key: str
+    method: str
+    url: str
+    fields: dict
+
+
+class AttachmentURL(BaseModel):
+    url: str
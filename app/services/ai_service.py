@@ -1,24 +1,129 @@
 # services/question_service.py
-import openai, asyncio, backoff, os
-from anthropic import Anthropic
+import openai, anthropic, asyncio, backoff, os, base64, json, time
+from anthropic import Anthropic, AsyncAnthropic
 from openai import OpenAI, AsyncOpenAI
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.prompt_budget import (
+    compact_prompt,
+    count_tokens,
+    truncate_to_tokens,
+    prepare_images,
+    InvalidImageError,
+    TRUNCATION_MARKER
+)
+from app.services.conversation import SUMMARY_PREFIX, compact_history, get_conversation_store
+from app.services.circuit_breaker import get_breaker
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+import re
+
+# Smallest share of the input budget the current message may be cut down to
+MIN_MESSAGE_TOKENS = 64
+
+# Failures that reflect the provider's health and count against its circuit breaker;
+# APITimeoutError is an APIConnectionError. 5xx status errors are added in is_provider_failure
+PROVIDER_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    anthropic.APIConnectionError,
+    anthropic.RateLimitError,
+    asyncio.TimeoutError
+)
+# Errors about the request itself (bad request, auth, prompt too long): failing over cannot help
+CLIENT_STATUS_ERRORS = (openai.APIStatusError, anthropic.APIStatusError)
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    if isinstance(error, PROVIDER_ERRORS):
+        return True
+    return isinstance(error, CLIENT_STATUS_ERRORS) and error.status_code >= 500
 
 class AIResponse(BaseModel):
     analysis_type: str
     reason: str
-    suggested_questions: List[str]
+    suggested_questions: List[str] = []
+
+# Built once at import; validate_json parses and validates in a single pass in pydantic-core
+ai_response_adapter = TypeAdapter(AIResponse)
+
+# OpenAI structured output schema matching AIResponse
+AI_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "question_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "analysis_type": {"type": "string", "enum": ["keep same", "separate", "rephrase"]},
+                "reason": {"type": "string"},
+                "suggested_questions": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["analysis_type", "reason", "suggested_questions"],
+            "additionalProperties": False
+        }
+    }
+}
+
+def anthropic_tool_format(response_format: Optional[dict]) -> dict:
+    """
+    Anthropic has no response_format; forcing a single tool whose input schema
+    is the JSON schema gives the same structured output guarantee
+    """
+    if not response_format or response_format.get("type") != "json_schema":
+        return {}
+    schema = response_format["json_schema"]
+    return {
+        "tools": [{
+            "name": schema["name"],
+            "description": "Record the analysis of the user's question",
+            "input_schema": schema["schema"]
+        }],
+        "tool_choice": {"type": "tool", "name": schema["name"]}
+    }
+
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_LINE_COMMENT_RE = re.compile(r"(?m)(?<=[\s,\[{])//[^\n]*$")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+def repair_json(text: str) -> str:
+    """Fix the usual LLM JSON slips: code fences, prose around the object, // comments, trailing commas"""
+    text = _CODE_FENCE_RE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start:end + 1]
+    text = _LINE_COMMENT_RE.sub("", text)
+    return _TRAILING_COMMA_RE.sub(r"\1", text)
+
+def parse_ai_response(text: str) -> AIResponse:
+    """Validate model output as AIResponse, attempting a local repair before giving up"""
+    try:
+        return ai_response_adapter.validate_json(text)
+    except ValidationError:
+        pass
+    response = ai_response_adapter.validate_json(repair_json(text))
+    metrics.incr("llm_parse_repaired")
+    return response
 
 class AIService():
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        self.message_history = []
+        # Retries are disabled so the circuit breaker and fallback routing own failure handling
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=0
+        )
+        self.anthropic = AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=0
+        )
+        self.conversations = get_conversation_store()
         
-        self.system_prompt = """
+        self.system_prompt = compact_prompt("""
         We are building a platform that help user quickly find matching consult to their questions, you are an expert on determine the following:
         1. Look the question as a whole, do you think these questions need to be answered by expert from different companies?
         2. Do you think the question need to be more elaborate? Or needs rephrasing for clarity and completeness?
@@ -26,38 +131,159 @@ class AIService():
         If answer to 1 is yes, you need to break down question to MINIMAL NUMBER OF subquestions. You should ONLY breakdown question if you think it is better to have expert from different companies to answer this question. ONLY separate if you think it is very necessary.
         If answer to 2 is yes, you should rephrase and make the question more clear
 
-        Return in this JSON format:
+        Return only a JSON object in this format:
         {
             "analysis_type": "keep same|separate|rephrase",
             "reason": "Brief explanation of your decision",
-            "suggested_questions": ["list of questions"] // only if breakdown or rephrase needed
+            "suggested_questions": ["list of questions"]
         }
+        Use an empty suggested_questions list when analysis_type is "keep same".
         
         When combining questions:
         - Maintain all original format if you does not change the problem
-        """
+        """)
 
-    async def analyze_question(self, question):
+    async def aclose(self):
+        await self.client.close()
+        await self.anthropic.close()
+
+    async def analyze_question(self, question, conversation_id: Optional[str] = None) -> AIResponse:
+        """
+        Analyze a question. When conversation_id is given, earlier turns of that
+        conversation are sent as context and the new turn is appended to it.
+        """
         try:
-            result, message_history = await self._get_response_from_llm(
+            conversation = {"summary": "", "messages": []}
+            if conversation_id:
+                conversation = await self.conversations.get(conversation_id)
+
+            system_message = self.system_prompt
+            if conversation["summary"]:
+                # Labelled so the model reads it as earlier context, not as instructions
+                system_message = f"{system_message}\n{SUMMARY_PREFIX} {conversation['summary']}"
+
+            result, message_history, model = await self._get_response_with_fallback(
                 msg=question,
                 imgs=None,  # Pass list of processed images
-                client=self.client,
-                model="gpt-4o-mini-2024-07-18"
+                system_message=system_message,
+                msg_history=conversation["messages"]
             )
-            
-            # Validate response format
-            if not isinstance(result, str):
-                raise ValueError("Invalid response format from LLM")
+
+            try:
+                analysis = parse_ai_response(result)
+            except ValidationError:
+                # Last resort: ask the model to fix its own output
+                metrics.incr("llm_parse_failures", stage="first")
+                metrics.incr("llm_reprompts")
+                result, reprompt_history, model = await self._get_response_with_fallback(
+                    msg="Your previous reply was not valid JSON in the required format. Reply again with only the JSON object.",
+                    imgs=None,
+                    system_message=system_message,
+                    msg_history=message_history
+                )
+                try:
+                    analysis = parse_ai_response(result)
+                except ValidationError:
+                    metrics.incr("llm_parse_failures", stage="reprompt")
+                    raise HTTPException(
+                        status_code=502,
+                        detail="LLM returned an invalid analysis"
+                    )
+                # Store the question with the corrected reply only; the failed reply and
+                # the corrective turn would otherwise ride along on every later turn
+                message_history = message_history[:-1] + reprompt_history[-1:]
+
+            if conversation_id:
+                await self.conversations.save(
+                    conversation_id,
+                    compact_history(
+                        {"summary": conversation["summary"], "messages": message_history},
+                        settings.CONVERSATION_MAX_HISTORY_TOKENS,
+                        model
+                    )
+                )
                 
-            return result
-            
+            return analysis
+
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"LLM analysis failed: {str(e)}"
             )
 
+    async def _get_response_with_fallback(self, msg, imgs, system_message, msg_history):
+        """
+        Try the primary model, then each fallback in order.
+        Models whose circuit is open are skipped without waiting, so a provider
+        incident costs at most one timeout per model until its breaker trips.
+        """
+        if imgs:
+            # Once for all models, off the event loop; PIL decoding and re-encoding are CPU-bound
+            try:
+                imgs = await run_in_threadpool(
+                    prepare_images,
+                    imgs,
+                    settings.LLM_IMAGE_MAX_BYTES,
+                    settings.LLM_IMAGE_MAX_SIDE
+                )
+            except InvalidImageError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        last_error = None
+        for model in [settings.LLM_PRIMARY_MODEL, *settings.LLM_FALLBACK_MODELS]:
+            breaker = get_breaker(model)
+            if not breaker.allow_request():
+                continue
+
+            client = self.anthropic if "claude" in model else self.client
+            start_time = time.monotonic()
+            try:
+                content, new_msg_history = await asyncio.wait_for(
+                    self._get_response_from_llm(
+                        msg=msg,
+                        imgs=imgs,
+                        client=client,
+                        model=model,
+                        system_message=system_message,
+                        msg_history=msg_history,
+                        response_format=AI_RESPONSE_FORMAT
+                    ),
+                    timeout=settings.LLM_TIMEOUT_SECONDS
+                )
+            except (asyncio.CancelledError, HTTPException):
+                # Cancellation and request errors (e.g. 413) say nothing about the provider
+                breaker.release()
+                raise
+            except Exception as e:
+                if is_provider_failure(e):
+                    breaker.record_failure()
+                    metrics.incr("llm_call_failures", model=model)
+                    last_error = e
+                    continue
+                breaker.release()
+                if isinstance(e, CLIENT_STATUS_ERRORS):
+                    # A 4xx is about our request, not the provider's health
+                    metrics.incr("llm_call_rejected", model=model, status=e.status_code)
+                    raise
+                # Our own bug or misconfiguration for this model; try the next one
+                metrics.incr("llm_call_errors", model=model)
+                last_error = e
+                continue
+
+            latency = time.monotonic() - start_time
+            breaker.record_success(latency)
+            metrics.observe("llm_call_latency_seconds", latency, model=model)
+            if model != settings.LLM_PRIMARY_MODEL:
+                metrics.incr("llm_fallback_calls", model=model)
+            return content, new_msg_history, model
+
+        raise HTTPException(
+            status_code=503,
+            detail=f"LLM analysis unavailable: {str(last_error) if last_error else 'all models circuit-open'}"
+        )
+
     async def _get_response_from_llm(
         self,
         msg,
@@ -68,12 +294,17 @@ class AIService():
         print_debug=False,
         msg_history=None,
         temperature=1,
+        response_format=None,
     ):
         if not system_message:
             system_message = self.system_prompt
 
         if msg_history is None:
-            msg_history = self.message_history
+            msg_history = []
+
+        # Keep the prompt inside the input token budget before dispatch
+        msg, msg_history = self._fit_to_budget(msg, system_message, msg_history, model)
+        imgs = imgs or []
         
         if "claude" in model:
             message_content = []
@@ -87,7 +318,6 @@ class AIService():
             
             # Add images if present, properly encoded in base64
             if imgs:
-                import base64
                 for img_data in imgs:
                     base64_image = base64.b64encode(img_data).decode('utf-8')
                     message_content.append({
@@ -108,13 +338,20 @@ class AIService():
             
             response = await client.messages.create(
                 model=model,
-                max_tokens=3000,
+                max_tokens=settings.LLM_MAX_OUTPUT_TOKENS,
                 temperature=temperature,
                 system=system_message,
                 messages=new_msg_history,
-                response_format=AIResponse
+                **anthropic_tool_format(response_format)
+            )
+            self._record_usage(
+                model,
+                getattr(response.usage, "input_tokens", 0),
+                getattr(response.usage, "output_tokens", 0)
             )
-            content = response.content[0].text
+            tool_use = next((block for block in response.content if block.type == "tool_use"), None)
+            # Kept in history as plain JSON text, so later turns need no tool_result
+            content = json.dumps(tool_use.input) if tool_use else response.content[0].text
             new_msg_history = new_msg_history + [
                 {
                     "role": "assistant",
@@ -132,7 +369,6 @@ class AIService():
             "gpt-4o-2024-08-06",
         ]:
             # For OpenAI models, combine images into base64 and create a single message
-            import base64
             message_text = []
             if msg:
                 message_text.append({"type":"text","text":msg})
@@ -146,21 +382,24 @@ class AIService():
                                                 "url":  f"data:image/jpeg;base64,{base64_image}"
                                             },
                                          })
-            #need to implemen history !!!
-            new_msg_history = []
+            new_msg_history = msg_history + [{"role": "user", "content": message_text}]
             response = await client.chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": system_message},
-                {
-                "role": "user",
-                "content": message_text,
-                },
+                *new_msg_history,
             ],
+            max_tokens=settings.LLM_MAX_OUTPUT_TOKENS,
+            **({"response_format": response_format} if response_format else {}),
             )
+            if response.usage:
+                self._record_usage(
+                    model,
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens
+                )
             content = response.choices[0].message.content
             new_msg_history = new_msg_history + [{"role": "assistant", "content": content}]
-            self.message_history = new_msg_history
         else:
             raise ValueError(f"Model {model} not supported.")
 
@@ -173,7 +412,48 @@ class AIService():
             print("*" * 21 + " LLM END " + "*" * 21)
             print()
         return content, new_msg_history
-    
+
+    def _fit_to_budget(self, msg, system_message, msg_history, model):
+        """
+        Fit system prompt + history + message into LLM_MAX_INPUT_TOKENS.
+        The oldest turns are dropped first (a user/assistant pair at a time) and
+        the current message is truncated only when history alone is not enough.
+        Returns (msg, msg_history); raises 413 when the system prompt leaves no
+        room for the message at all.
+        """
+        def tokens_of(m):
+            return count_tokens(m["content"] if isinstance(m["content"], str) else json.dumps(m["content"]), model)
+
+        system_tokens = count_tokens(system_message, model)
+        history_tokens = [tokens_of(m) for m in msg_history]
+        msg_tokens = count_tokens(msg, model) if msg else 0
+        metrics.observe("llm_prompt_tokens_estimated", system_tokens + sum(history_tokens) + msg_tokens, model=model)
+
+        budget = settings.LLM_MAX_INPUT_TOKENS
+        dropped = 0
+        while dropped < len(msg_history) and system_tokens + sum(history_tokens[dropped:]) + msg_tokens > budget:
+            dropped += 2
+        if dropped:
+            metrics.incr("llm_history_trimmed", model=model)
+            msg_history = msg_history[dropped:]
+            history_tokens = history_tokens[dropped:]
+
+        available = budget - system_tokens - sum(history_tokens)
+        if not msg or msg_tokens <= available:
+            return msg, msg_history
+        if available < MIN_MESSAGE_TOKENS + count_tokens(TRUNCATION_MARKER, model):
+            raise HTTPException(
+                status_code=413,
+                detail="Question does not fit in the model's input budget"
+            )
+        metrics.incr("llm_prompt_truncations", model=model)
+        return truncate_to_tokens(msg, available, model), msg_history
+
+    def _record_usage(self, model, prompt_tokens, completion_tokens):
+        """Account provider-reported token usage per call"""
+        metrics.incr("llm_calls", model=model)
+        metrics.incr("llm_prompt_tokens", prompt_tokens or 0, model=model)
+        metrics.incr("llm_completion_tokens", completion_tokens or 0, model=model)
 
 
     @backoff.on_exception(backoff.expo, (openai.RateLimitError, openai.APITimeoutError))
@@ -239,4 +519,22 @@ class AIService():
             print("*" * 21 + " LLM END " + "*" * 21)
             print()
 
-        return content, new_msg_history
\ No newline at end of file
+        return content, new_msg_history
+
+
+_ai_service: Optional[AIService] = None
+
+
+def get_ai_service() -> AIService:
+    """Process-wide service so the provider clients' connection pools are reused across requests"""
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AIService()
+    return _ai_service
+
+
+async def close_ai_service():
+    global _ai_service
+    if _ai_service is not None:
+        await _ai_service.aclose()
+        _ai_service = None
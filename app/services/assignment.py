@@ -0,0 +1,129 @@
+# services/assignment.py
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.session import SessionModel
+from app.services.expert_stats import ExpertStatsService
+from app.services.matching import ExpertMatchingService
+
+
+class ExpertLoadTracker:
+    """
+    Active session count per expert (user id).
+    Seeded from the sessions table and refreshed every refresh_seconds; sessions
+    opened or closed in this process are applied immediately in between.
+    """
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._counts: Counter = Counter()
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, db: Session):
+        rows = db.query(SessionModel.expert_id, func.count(SessionModel.id)).filter(
+            SessionModel.status == "active"
+        ).group_by(SessionModel.expert_id).all()
+        with self._lock:
+            self._counts = Counter({expert_id: count for expert_id, count in rows})
+            self._refreshed_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session):
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at > self.refresh_seconds:
+            self.rebuild(db)
+
+    def load(self, expert_id: uuid.UUID) -> int:
+        with self._lock:
+            return self._counts[expert_id]
+
+    def session_opened(self, expert_id: uuid.UUID):
+        with self._lock:
+            self._counts[expert_id] += 1
+
+    def session_closed(self, expert_id: uuid.UUID):
+        with self._lock:
+            if self._counts[expert_id] > 0:
+                self._counts[expert_id] -= 1
+
+
+class ExpertAssigner:
+    """
+    Picks one expert from ranked matches while spreading load.
+    Experts at capacity are skipped; among the top_candidates remaining, two are
+    sampled and the less loaded one wins (power of two choices), with the
+    better match score breaking ties. The in-process tracker only guides the
+    choice: capacity is enforced by reserving the slot in expert_stats.
+    """
+    def __init__(
+        self,
+        tracker: ExpertLoadTracker,
+        capacity: int,
+        top_candidates: int,
+        rng: Optional[random.Random] = None
+    ):
+        self.tracker = tracker
+        self.capacity = capacity
+        self.top_candidates = top_candidates
+        self.rng = rng or random.Random()
+
+    def choose(self, matches: List[Dict[str, any]]) -> Optional[Dict[str, any]]:
+        """matches are ExpertMatchingService results, best first"""
+        candidates = [
+            m for m in matches
+            if self.tracker.load(m['expert'].user_id) < self.capacity
+        ][:self.top_candidates]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+
+        first, second = self.rng.sample(candidates, 2)
+        return min(
+            (first, second),
+            key=lambda m: (self.tracker.load(m['expert'].user_id), -m['score'])
+        )
+
+    async def assign(
+        self,
+        db: Session,
+        question_id: uuid.UUID,
+        matching_service: Optional[ExpertMatchingService] = None,
+        **match_kwargs
+    ) -> Optional[Dict[str, any]]:
+        """
+        Match experts for a question and reserve a session slot with one of them.
+        Joins the caller's transaction; the caller commits the reservation
+        together with the session row.
+        """
+        await run_in_threadpool(self.tracker.ensure_fresh, db)
+        matching_service = matching_service or ExpertMatchingService()
+        matches = await matching_service.match_experts(db, question_id, **match_kwargs)
+        return await run_in_threadpool(self._reserve, db, matches)
+
+    def _reserve(self, db: Session, matches: List[Dict[str, any]]) -> Optional[Dict[str, any]]:
+        stats = ExpertStatsService(db)
+        while matches:
+            match = self.choose(matches)
+            if match is None:
+                return None
+            if stats.reserve_session(match['expert'].user_id, self.capacity):
+                return match
+            # Full per the database; our count was stale, so try the next choice
+            matches = [m for m in matches if m is not match]
+        return None
+
+
+expert_load = ExpertLoadTracker(refresh_seconds=settings.EXPERT_LOAD_REFRESH_SECONDS)
+expert_assigner = ExpertAssigner(
+    expert_load,
+    capacity=settings.EXPERT_MAX_ACTIVE_SESSIONS,
+    top_candidates=settings.ASSIGNMENT_TOP_CANDIDATES
+)
@@ -1,14 +1,15 @@
 # services/auth.py
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Tuple
+import uuid
 from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from jose import jwt
-from authlib.integrations.starlette_client import OAuth
 
 from app.core.config import settings
+from app.services.oauth import oauth_registry
 from app.models.user import User
 from app.models.expert import ExpertProfile
 from app.schemas.auth import (
@@ -21,81 +22,51 @@ from app.schemas.auth import (
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
-        self._setup_oauth()
+        # Shared registry: provider metadata and keys are fetched once per process
+        self.oauth = oauth_registry.oauth
 
-    def _setup_oauth(self):
-        """Initialize OAuth clients"""
-        self.oauth = OAuth()
-        
-        
-        # More explicit Google OAuth setup
-        self.oauth.register(
-            name='google',
-            client_id=settings.GOOGLE_CLIENT_ID,
-            client_secret=settings.GOOGLE_CLIENT_SECRET,
-            authorize_state=settings.SECRET_KEY,
-            server_metadata_url="https://accounts.google.com/.well-known/openid-configuration", 
-            client_kwargs={
-                'scope': 'profile openid email',
-                'redirect_url': settings.GOOGLE_REDIRECT_URI
-            }
-        )
-        
-        # LinkedIn OAuth setup with updated configuration
-        self.oauth.register(
-            name='linkedin',
-            client_id=settings.LINKEDIN_CLIENT_ID,
-            client_secret=settings.LINKEDIN_CLIENT_SECRET,
-            api_base_url='https://api.linkedin.com/v2/',
-            authorize_url='https://www.linkedin.com/oauth/v2/authorization',
-            access_token_url='https://www.linkedin.com/oauth/v2/accessToken',
-            jwks_uri= "https://www.linkedin.com/oauth/openid/jwks",
-            client_kwargs={
-                'scope': 'openid profile email',
-                'redirect_url': settings.LINKEDIN_REDIRECT_URI
-            }
-        )
-        
     async def _get_or_create_user(
         self,
         email: str,
         user_data: Dict
     ) -> User:
-        """Get existing user or create new one"""
-        # Check if user exists
-        user = self.db.query(User).filter(User.email == email).first()
-        
-        if not user:
-            # Create new user
-            user = User(
-                email=email,
-                full_name=user_data.get('full_name'),
-                hashed_password ="testinput"
-            )
-            self.db.add(user)
-            self.db.commit()
-            self.db.refresh(user)
-        else:
-            # Update existing user
-            if user_data.get('google_id'):
-                user.google_id = user_data['google_id']
-            if user_data.get('full_name'):
-                user.full_name = user_data['full_name']
-            self.db.commit()
-            self.db.refresh(user)
+        """Get existing user or create new one, in a single upsert"""
+        now = datetime.utcnow()
+        values = {
+            'id': uuid.uuid4(),
+            'email': email,
+            'full_name': user_data.get('full_name'),
+            'hashed_password': "testinput",
+            'is_active': True,
+            'created_at': now,
+            'updated_at': now
+        }
+        if user_data.get('role'):
+            values['role'] = user_data['role']
 
+        stmt = insert(User).values(**values)
+        set_ = {
+            # Keep the stored name when the provider did not send one
+            'full_name': func.coalesce(stmt.excluded.full_name, User.full_name),
+            'updated_at': stmt.excluded.updated_at
+        }
+        if 'role' in values:
+            # Only fills a missing role; an existing admin or client keeps theirs
+            set_['role'] = func.coalesce(User.role, stmt.excluded.role)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_=set_
+        ).returning(User)
+
+        user = self.db.scalars(stmt, execution_options={"populate_existing": True}).one()
+        self.db.commit()
         return user
     
     async def user_google_auth(self, token: str) -> TokenResponse:
         """Handle Google authentication for regular users"""
         try:
-            # Verify Google token
-            #breakpoint()
-            idinfo = id_token.verify_oauth2_token(
-                token,
-                requests.Request(),
-                settings.GOOGLE_CLIENT_ID
-            )
+            # Verify Google token against the cached signing keys
+            idinfo = await oauth_registry.verify_google_id_token(token)
 
             email = idinfo.get('email')
             if not email:
@@ -234,30 +205,50 @@ class AuthService:
         email: str,
         expert_data: Dict
     ) -> ExpertProfile:
-        """Get existing expert or create new one"""
-        # First create/get user account
-        user = await self._get_or_create_user(
+        """Get existing expert or create new one; user and profile are upserted in one transaction"""
+        now = datetime.utcnow()
+        stmt = insert(User).values(
+            id=uuid.uuid4(),
             email=email,
-            user_data={
-                'full_name': expert_data.get('full_name'),
-                'is_expert': True
-            }
+            full_name=expert_data.get('full_name'),
+            hashed_password="testinput",
+            role='expert',
+            is_active=True,
+            created_at=now,
+            updated_at=now
         )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={
+                'full_name': func.coalesce(stmt.excluded.full_name, User.full_name),
+                # Only fills a missing role; an existing admin or client keeps theirs
+                'role': func.coalesce(User.role, stmt.excluded.role),
+                'updated_at': stmt.excluded.updated_at
+            }
+        ).returning(User.id)
+        user_id = self.db.execute(stmt).scalar_one()
 
-        # Then get/create expert profile
-        expert = self.db.query(ExpertProfile).filter(ExpertProfile.user_id == user.id).first()
-        if not expert:
-            expert = ExpertProfile(
-                user_id=user.id,
-                linkedin_id=expert_data.get('linkedin_id'),
-                expertise_areas=[],  # To be filled later
-                is_verified=True,    # For MVP, we trust LinkedIn
-                is_available=True    # Initially available
-            )
-            self.db.add(expert)
-            self.db.commit()
-            self.db.refresh(expert)
+        stmt = insert(ExpertProfile).values(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            linkedin_id=expert_data.get('linkedin_id'),
+            expertise=[],  # To be filled later
+            verification_status='verified',  # For MVP, we trust LinkedIn
+            # Picked up by the background check poller; never reset on later logins
+            background_check_status='pending',
+            created_at=now,
+            updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExpertProfile.user_id],
+            set_={
+                'linkedin_id': func.coalesce(stmt.excluded.linkedin_id, ExpertProfile.linkedin_id),
+                'updated_at': stmt.excluded.updated_at
+            }
+        ).returning(ExpertProfile)
 
+        expert = self.db.scalars(stmt, execution_options={"populate_existing": True}).one()
+        self.db.commit()
         return expert
 
     def _create_tokens(
@@ -0,0 +1,164 @@
+# services/availability.py
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.expert import ExpertAvailability
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def parse_hhmm(value: str) -> int:
+    """Minutes since midnight for an HH:MM string"""
+    hours, minutes = value.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time: {value}")
+    return hours * 60 + minutes
+
+
+def week_start(moment: datetime) -> datetime:
+    """Monday 00:00 UTC of the week containing moment"""
+    moment = moment.astimezone(timezone.utc)
+    return (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def to_utc_week_intervals(
+    day_of_week: int,
+    start_time: str,
+    end_time: str,
+    tz_name: str,
+    reference: datetime
+) -> List[Tuple[int, int]]:
+    """
+    Convert a local weekly window into [start, end) minute-of-week intervals in UTC.
+    Offsets are taken for the week of reference, so DST is right for that week;
+    windows crossing the week boundary are split in two.
+    """
+    tz = ZoneInfo(tz_name)
+    start_minutes, end_minutes = parse_hhmm(start_time), parse_hhmm(end_time)
+    if end_minutes <= start_minutes:
+        end_minutes += MINUTES_PER_DAY  # Overnight window
+
+    monday = week_start(reference).date()
+    local_day = datetime(monday.year, monday.month, monday.day, tzinfo=tz) + timedelta(days=day_of_week)
+    start_utc = (local_day + timedelta(minutes=start_minutes)).astimezone(timezone.utc)
+    end_utc = (local_day + timedelta(minutes=end_minutes)).astimezone(timezone.utc)
+
+    base = datetime(monday.year, monday.month, monday.day, tzinfo=timezone.utc)
+    start = int((start_utc - base).total_seconds() // 60) % MINUTES_PER_WEEK
+    length = int((end_utc - start_utc).total_seconds() // 60)
+    end = start + length
+    if end <= MINUTES_PER_WEEK:
+        return [(start, end)]
+    return [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+
+
+class IntervalIndex:
+    """
+    Static interval index: intervals sorted by start plus a max-end segment tree.
+    An overlap query binary-searches the starts and walks only subtrees whose max
+    end reaches into the window, i.e. O(log n + k log n) for k matches.
+    """
+    def __init__(self, intervals: Iterable[Tuple[int, int, uuid.UUID]]):
+        ordered = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in ordered]
+        self.ends = [interval[1] for interval in ordered]
+        self.ids = [interval[2] for interval in ordered]
+
+        self.size = 1
+        while self.size < max(len(ordered), 1):
+            self.size *= 2
+        self.tree = [-1] * (2 * self.size)
+        for i, end in enumerate(self.ends):
+            self.tree[self.size + i] = end
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def overlapping(self, query_start: int, query_end: int) -> Set[uuid.UUID]:
+        """Ids of intervals with start < query_end and end > query_start"""
+        limit = bisect_left(self.starts, query_end)
+        found: Set[uuid.UUID] = set()
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or self.tree[node] <= query_start:
+                continue
+            if hi - lo == 1:
+                found.add(self.ids[lo])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node, lo, mid))
+            stack.append((2 * node + 1, mid, hi))
+        return found
+
+
+class AvailabilityIndex:
+    """Weekly expert availability normalized to UTC; rebuilt from the database when stale"""
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._index = IntervalIndex([])
+        self._scheduled: Set[uuid.UUID] = set()
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, db: Session, now: Optional[datetime] = None):
+        now = now or datetime.now(timezone.utc)
+        intervals = []
+        scheduled = set()
+        for slot in db.query(ExpertAvailability).yield_per(1000):
+            try:
+                slot_intervals = to_utc_week_intervals(
+                    slot.day_of_week, slot.start_time, slot.end_time, slot.timezone, now
+                )
+            except (ZoneInfoNotFoundError, ValueError) as e:
+                # One bad row must not take every expert's schedule down with it
+                logger.warning(f"Skipping availability slot {slot.id}: {str(e)}")
+                continue
+            scheduled.add(slot.expert_id)
+            for start, end in slot_intervals:
+                intervals.append((start, end, slot.expert_id))
+        index = IntervalIndex(intervals)
+        with self._lock:
+            self._index = index
+            self._scheduled = scheduled
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session):
+        if self._built_at is None or time.monotonic() - self._built_at > self.ttl_seconds:
+            self.rebuild(db)
+
+    def invalidate(self):
+        self._built_at = None
+
+    def scheduled(self) -> Set[uuid.UUID]:
+        """Experts with at least one valid availability slot"""
+        return self._scheduled
+
+    def available_within(self, hours: float, now: Optional[datetime] = None) -> Set[uuid.UUID]:
+        """Experts with any availability between now and now + hours"""
+        now = now or datetime.now(timezone.utc)
+        index = self._index
+        window = int(hours * 60)
+        if window >= MINUTES_PER_WEEK:
+            return set(index.ids)
+
+        start = int((now - week_start(now)).total_seconds() // 60)
+        end = start + window
+        if end <= MINUTES_PER_WEEK:
+            return index.overlapping(start, end)
+        return index.overlapping(start, MINUTES_PER_WEEK) | index.overlapping(0, end - MINUTES_PER_WEEK)
+
+
+availability_index = AvailabilityIndex(ttl_seconds=settings.AVAILABILITY_INDEX_TTL_SECONDS)
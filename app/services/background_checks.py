@@ -0,0 +1,179 @@
+# services/background_checks.py
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.expert import ExpertProfile
+from app.models.user import User
+from app.utils.back_ground_check import BackgroundCheckService, get_background_check_service
+
+logger = logging.getLogger(__name__)
+
+# Provider statuses mapped onto ours; anything else is still pending
+STATUS_MAP = {
+    "passed": "passed",
+    "clear": "passed",
+    "failed": "failed",
+    "consider": "failed",
+    "suspended": "failed",
+}
+
+
+def next_poll_delay(started_at: Optional[datetime], now: datetime) -> float:
+    """Poll young checks often and old ones rarely: a quarter of the check's age, clamped"""
+    age = (now - started_at).total_seconds() if started_at else 0
+    return min(
+        max(age / 4, settings.BACKGROUND_CHECK_POLL_MIN_SECONDS),
+        settings.BACKGROUND_CHECK_POLL_MAX_SECONDS
+    )
+
+
+class BackgroundCheckPoller:
+    """
+    Drives every pending background check. Experts still waiting for a check
+    to be started get one; checks that are due are polled. Both happen
+    BACKGROUND_CHECK_BATCH_SIZE rows at a time, with at most
+    BACKGROUND_CHECK_CONCURRENCY requests in flight, and each batch is written
+    back in bulk. Database work runs in the threadpool.
+    """
+    def __init__(self, service: Optional[BackgroundCheckService] = None):
+        self.service = service or get_background_check_service()
+        self.batch_size = settings.BACKGROUND_CHECK_BATCH_SIZE
+        self.concurrency = settings.BACKGROUND_CHECK_CONCURRENCY
+
+    async def _gather(self, calls: List) -> List:
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def limited(call):
+            async with slots:
+                return await call()
+
+        return await asyncio.gather(*(limited(call) for call in calls), return_exceptions=True)
+
+    def _due_filter(self, now: datetime):
+        return [
+            ExpertProfile.background_check_status == "pending",
+            or_(
+                ExpertProfile.background_check_next_poll_at.is_(None),
+                ExpertProfile.background_check_next_poll_at <= now
+            )
+        ]
+
+    def _load_unstarted(self, db: Session, now: datetime) -> List:
+        return db.query(ExpertProfile.id, ExpertProfile.user_id, User.email, User.full_name).join(
+            User, User.id == ExpertProfile.user_id
+        ).filter(
+            ExpertProfile.background_check_id.is_(None),
+            *self._due_filter(now)
+        ).order_by(ExpertProfile.background_check_next_poll_at).limit(self.batch_size).all()
+
+    def _load_due(self, db: Session, now: datetime) -> List:
+        return db.query(
+            ExpertProfile.id,
+            ExpertProfile.background_check_id,
+            ExpertProfile.background_check_started_at
+        ).filter(
+            ExpertProfile.background_check_id.isnot(None),
+            *self._due_filter(now)
+        ).order_by(ExpertProfile.background_check_next_poll_at).limit(self.batch_size).all()
+
+    def _write_back(self, db: Session, updates: List[Dict]):
+        # Rows differ in which columns change; group so each executemany is uniform
+        by_shape: Dict[tuple, list] = {}
+        for values in updates:
+            by_shape.setdefault(tuple(sorted(values)), []).append(values)
+        for rows in by_shape.values():
+            db.execute(update(ExpertProfile), rows)
+        db.commit()
+
+    async def start_pending(self, db: Session, now: Optional[datetime] = None) -> Tuple[int, bool]:
+        """(checks started, whether a full batch was waiting) for pending experts without a check"""
+        now = now or datetime.utcnow()
+        rows = await run_in_threadpool(self._load_unstarted, db, now)
+        if not rows:
+            return 0, False
+
+        results = await self._gather([
+            partial(self.service.initiate_check, {
+                "expert_id": str(row.user_id),
+                "email": row.email,
+                "full_name": row.full_name
+            })
+            for row in rows
+        ])
+
+        updates = []
+        started = 0
+        for row, result in zip(rows, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Background check for expert {row.user_id} could not be started: {str(result)}")
+                metrics.incr("background_check_start_errors")
+                # Retry on a later tick instead of hammering the provider
+                updates.append({
+                    "id": row.id,
+                    "background_check_next_poll_at": now + timedelta(
+                        seconds=settings.BACKGROUND_CHECK_POLL_MIN_SECONDS
+                    )
+                })
+                continue
+            started += 1
+            updates.append({
+                "id": row.id,
+                "background_check_id": str(result["id"]),
+                "background_check_started_at": now,
+                "background_check_next_poll_at": now + timedelta(seconds=next_poll_delay(now, now))
+            })
+        await run_in_threadpool(self._write_back, db, updates)
+
+        metrics.incr("background_checks_started", started)
+        return started, len(rows) == self.batch_size
+
+    async def poll_due(self, db: Session, now: Optional[datetime] = None) -> Tuple[int, bool]:
+        """(checks resolved, whether a full batch was due so more may be waiting)"""
+        now = now or datetime.utcnow()
+        due = await run_in_threadpool(self._load_due, db, now)
+        if not due:
+            return 0, False
+
+        results = await self._gather([
+            partial(self.service.get_check_status, row.background_check_id) for row in due
+        ])
+
+        updates = []
+        resolved = 0
+        for row, result in zip(due, results):
+            status = None
+            if isinstance(result, Exception):
+                logger.warning(f"Background check {row.background_check_id} poll failed: {str(result)}")
+                metrics.incr("background_check_poll_errors")
+            else:
+                status = STATUS_MAP.get(str(result.get("status", "")).lower())
+
+            if status:
+                resolved += 1
+                updates.append({
+                    "id": row.id,
+                    "background_check_status": status,
+                    "background_check_next_poll_at": None,
+                    "updated_at": now
+                })
+            else:
+                updates.append({
+                    "id": row.id,
+                    "background_check_next_poll_at": now + timedelta(
+                        seconds=next_poll_delay(row.background_check_started_at, now)
+                    )
+                })
+        await run_in_threadpool(self._write_back, db, updates)
+
+        metrics.incr("background_checks_polled", len(due))
+        metrics.incr("background_checks_resolved", resolved)
+        return resolved, len(due) == self.batch_size
@@ -0,0 +1,125 @@
+# services/circuit_breaker.py
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+    A call counts as bad when it fails or takes longer than slow_call_seconds. Once
+    the bad-call rate over the window crosses failure_rate_threshold the circuit opens
+    and rejects calls for open_seconds, then lets a limited number of probe calls
+    through (half-open) to decide whether to close again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._window = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(self.HALF_OPEN)
+
+    def _transition(self, state: str):
+        self._state = state
+        self._half_open_in_flight = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if state == self.CLOSED:
+            self._window.clear()
+        metrics.set_gauge("circuit_breaker_open", int(state != self.CLOSED), name=self.name)
+        metrics.incr("circuit_breaker_transitions", name=self.name, state=state)
+
+    def allow_request(self) -> bool:
+        """Whether a call may be attempted now; reserves a probe slot when half-open"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            metrics.incr("circuit_breaker_rejected", name=self.name)
+            return False
+
+    def release(self):
+        """Give back a reserved probe slot for a call that was abandoned without a result"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def record_success(self, latency: float):
+        if latency > self.slow_call_seconds:
+            self._record(bad=True)
+        else:
+            self._record(bad=False)
+
+    def record_failure(self):
+        self._record(bad=True)
+
+    def _record(self, bad: bool):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._transition(self.OPEN if bad else self.CLOSED)
+                return
+            if self._state == self.OPEN:
+                return
+            self._window.append(bad)
+            if len(self._window) >= self.min_calls:
+                failure_rate = sum(self._window) / len(self._window)
+                if failure_rate >= self.failure_rate_threshold:
+                    self._transition(self.OPEN)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a provider/model, created on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_rate_threshold=settings.LLM_BREAKER_FAILURE_RATE,
+                slow_call_seconds=settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+                window_size=settings.LLM_BREAKER_WINDOW_SIZE,
+                min_calls=settings.LLM_BREAKER_MIN_CALLS,
+                open_seconds=settings.LLM_BREAKER_OPEN_SECONDS
+            )
+            _breakers[name] = breaker
+        return breaker
@@ -0,0 +1,162 @@
+# services/conversation.py
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services.prompt_budget import count_tokens, truncate_to_tokens
+
+SUMMARY_PREFIX = "Summary of earlier conversation:"
+
+
+def _text_of(message: Dict) -> str:
+    """Flatten a chat message into plain text, dropping image parts"""
+    content = message["content"]
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content:
+        if part.get("type") == "text":
+            parts.append(part["text"])
+        else:
+            parts.append("[image]")
+    return " ".join(parts)
+
+
+def compact_history(
+    conversation: Dict,
+    max_tokens: int,
+    model: str
+) -> Dict:
+    """
+    Keep the newest turns that fit in max_tokens and append older ones to the
+    summary. The "summary" is not model-written: the old turns are concatenated
+    and cut to a quarter of max_tokens, keeping the head and the tail.
+    Messages are stored as plain text so images are never resent on follow-ups.
+    """
+    messages = [
+        {"role": m["role"], "content": _text_of(m)}
+        for m in conversation.get("messages", [])
+    ]
+    summary = conversation.get("summary", "")
+
+    kept, used = [], count_tokens(summary, model)
+    # Walk back over whole user/assistant turns so the window always starts on a user message
+    index = len(messages)
+    while index > 0:
+        start = index - 1
+        while start > 0 and messages[start]["role"] != "user":
+            start -= 1
+        turn = messages[start:index]
+        turn_tokens = sum(count_tokens(m["content"], model) for m in turn)
+        if used + turn_tokens > max_tokens and kept:
+            break
+        kept = turn + kept
+        used += turn_tokens
+        index = start
+
+    dropped = messages[:index]
+    if dropped:
+        dropped_text = " ".join(f"{m['role']}: {m['content']}" for m in dropped)
+        summary = truncate_to_tokens(
+            f"{summary} {dropped_text}".strip(),
+            max(max_tokens // 4, 1),
+            model
+        )
+
+    return {"summary": summary, "messages": kept}
+
+
+class ConversationStore(ABC):
+    """Conversation history keyed by conversation id"""
+    @abstractmethod
+    async def get(self, conversation_id: str) -> Dict:
+        ...
+
+    @abstractmethod
+    async def save(self, conversation_id: str, conversation: Dict):
+        ...
+
+    @abstractmethod
+    async def delete(self, conversation_id: str):
+        ...
+
+
+class InMemoryConversationStore(ConversationStore):
+    """LRU store with per-entry TTL for single-process deployments"""
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def get(self, conversation_id: str) -> Dict:
+        async with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return {"summary": "", "messages": []}
+            expires_at, conversation = entry
+            if expires_at < time.monotonic():
+                del self._entries[conversation_id]
+                return {"summary": "", "messages": []}
+            self._entries.move_to_end(conversation_id)
+            return conversation
+
+    async def save(self, conversation_id: str, conversation: Dict):
+        async with self._lock:
+            self._entries[conversation_id] = (time.monotonic() + self.ttl_seconds, conversation)
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, conversation_id: str):
+        async with self._lock:
+            self._entries.pop(conversation_id, None)
+
+
+class RedisConversationStore(ConversationStore):
+    """Redis-backed store shared by all workers; Redis handles expiry"""
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        from redis import asyncio as aioredis
+        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}"
+
+    async def get(self, conversation_id: str) -> Dict:
+        raw = await self.redis.get(self._key(conversation_id))
+        if not raw:
+            return {"summary": "", "messages": []}
+        return json.loads(raw)
+
+    async def save(self, conversation_id: str, conversation: Dict):
+        await self.redis.set(
+            self._key(conversation_id),
+            json.dumps(conversation),
+            ex=self.ttl_seconds
+        )
+
+    async def delete(self, conversation_id: str):
+        await self.redis.delete(self._key(conversation_id))
+
+
+_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Shared store: Redis when configured, in-process LRU otherwise"""
+    global _store
+    if _store is None:
+        if settings.REDIS_HOST:
+            _store = RedisConversationStore(settings.REDIS_URL, settings.CONVERSATION_TTL_SECONDS)
+        else:
+            _store = InMemoryConversationStore(
+                settings.CONVERSATION_MAX_ENTRIES,
+                settings.CONVERSATION_TTL_SECONDS
+            )
+    return _store
@@ -0,0 +1,153 @@
+# services/dedup.py
+import re
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.question import Question
+
+# Mersenne prime for the (a * x + b) mod p hash family; crc32 values and the
+# coefficients are < 2**32 so the products fit in uint64
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures over character shingles, bucketed by LSH bands.
+    A lookup hashes the new text into its bands and only compares against
+    entries sharing a bucket, so expected cost does not grow with the index.
+    The oldest entries are evicted once max_entries is reached.
+    """
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+        threshold: float = 0.85,
+        max_entries: int = 200000,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, Dict[str, Any]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def _shingles(self, content: str) -> Set[str]:
+        content = _WHITESPACE_RE.sub(" ", content.lower()).strip()
+        if len(content) <= self.shingle_size:
+            return {content}
+        return {content[i:i + self.shingle_size] for i in range(len(content) - self.shingle_size + 1)}
+
+    def signature(self, content: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode()) for s in self._shingles(content)),
+            dtype=np.uint64
+        )
+        # (num_perm, n_shingles) permuted hashes, min over shingles per permutation
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: str, content: str, payload: Dict[str, Any]):
+        signature = self.signature(content)
+        with self._lock:
+            self._remove(key)
+            self._insert(key, signature, payload)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _insert(self, key: str, signature: np.ndarray, payload: Dict[str, Any]):
+        self._entries[key] = (signature, payload)
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].add(key)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in self._band_keys(entry[0]):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def query(self, content: str) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Entries whose estimated Jaccard similarity is at least threshold, most similar first"""
+        signature = self.signature(content)
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+            matches = []
+            for key in candidates:
+                other, payload = self._entries[key]
+                similarity = float(np.mean(signature == other))
+                if similarity >= self.threshold:
+                    matches.append((key, similarity, payload))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def find(self, content: str, **filters) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """Most similar entry whose payload matches all filters"""
+        for match in self.query(content):
+            if all(match[2].get(k) == v for k, v in filters.items()):
+                return match
+        return None
+
+    def rebuild(self, db: Session, batch_size: int = 1000):
+        """
+        Load stored questions, newest first, into whatever room the index has
+        left. Entries already present are kept, and loaded questions go behind
+        them in eviction order, so live entries added meanwhile are not lost.
+        """
+        rows = db.query(Question.id, Question.client_id, Question.content).order_by(
+            Question.created_at.desc()
+        ).yield_per(batch_size)
+        for question_id, client_id, content in rows:
+            key = f"question:{question_id}"
+            signature = self.signature(content)
+            with self._lock:
+                if len(self._entries) >= self.max_entries:
+                    break
+                if key in self._entries:
+                    continue
+                self._insert(
+                    key,
+                    signature,
+                    {"kind": "question", "client_id": str(client_id), "question_id": str(question_id)}
+                )
+                self._entries.move_to_end(key, last=False)
+
+
+question_dedup = NearDuplicateIndex(
+    num_perm=settings.DEDUP_NUM_PERM,
+    bands=settings.DEDUP_BANDS,
+    threshold=settings.DEDUP_THRESHOLD,
+    max_entries=settings.DEDUP_MAX_ENTRIES
+)
@@ -1,36 +1,323 @@
-from cryptography.fernet import Fernet
-from typing import Tuple
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, MultiFernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import asyncio
 import base64
-from app.core.config import Settings
+import os
+import struct
+import threading
+import time
+from app.core.config import Settings, settings as app_settings
+from app.core.executor import BoundedExecutor, crypto_executor
+
+# Chunked AES-256-GCM stream:
+#   header = MAGIC | chunk_size (u32 BE) | nonce_prefix (7 bytes)
+#   body   = one ciphertext+tag per chunk of chunk_size plaintext bytes
+# Chunk nonce = nonce_prefix | counter (u32 BE) | last-chunk flag, and the header is
+# authenticated with every chunk, so chunks cannot be reordered, dropped or truncated.
+STREAM_MAGIC = b"QCS1"
+NONCE_PREFIX_SIZE = 7
+TAG_SIZE = 16
+HEADER_SIZE = len(STREAM_MAGIC) + 4 + NONCE_PREFIX_SIZE
+DATA_KEY_SIZE = 32
+
+# Wrapped data key = KEY_MAGIC | len(key_id) (1 byte) | key_id | Fernet token.
+# Keys wrapped before key ids existed are a bare token (or base64 of one) and
+# are tried against every configured master key.
+KEY_MAGIC = b"QCK1"
+
+
+def _chunk_nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    return prefix + struct.pack(">I", counter) + (b"\x01" if last else b"\x00")
+
+
+def _rechunk(chunks: Iterable[bytes], size: int) -> Iterator[Tuple[bytes, bool]]:
+    """Regroup arbitrary input chunks into (block, is_last) pairs of exactly size bytes"""
+    buffer = bytearray()
+    pending = None
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= size:
+            if pending is not None:
+                yield pending, False
+            pending = bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        if pending is not None:
+            yield pending, False
+        yield bytes(buffer), True
+    else:
+        yield (pending if pending is not None else b""), True
+
+
+def encrypt_stream(key: bytes, chunks: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Encrypt an iterable of plaintext bytes; memory use is bounded by chunk_size"""
+    aead = AESGCM(key)
+    header = STREAM_MAGIC + struct.pack(">I", chunk_size) + os.urandom(NONCE_PREFIX_SIZE)
+    prefix = header[-NONCE_PREFIX_SIZE:]
+    yield header
+    for counter, (block, last) in enumerate(_rechunk(chunks, chunk_size)):
+        yield aead.encrypt(_chunk_nonce(prefix, counter, last), block, header)
+
+
+def decrypt_stream(key: bytes, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Inverse of encrypt_stream; raises ValueError on tampering or truncation"""
+    aead = AESGCM(key)
+    chunks = iter(chunks)
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= HEADER_SIZE:
+            break
+    header = bytes(buffer[:HEADER_SIZE])
+    if len(header) < HEADER_SIZE or not header.startswith(STREAM_MAGIC):
+        raise ValueError("Not an encrypted stream")
+    del buffer[:HEADER_SIZE]
+    chunk_size = struct.unpack(">I", header[len(STREAM_MAGIC):len(STREAM_MAGIC) + 4])[0]
+    prefix = header[-NONCE_PREFIX_SIZE:]
+
+    def remaining():
+        if buffer:
+            yield bytes(buffer)
+        yield from chunks
+
+    try:
+        for counter, (block, last) in enumerate(_rechunk(remaining(), chunk_size + TAG_SIZE)):
+            yield aead.decrypt(_chunk_nonce(prefix, counter, last), block, header)
+    except InvalidTag as e:
+        raise ValueError("Encrypted stream failed authentication") from e
+
+
+def is_stream_format(data: bytes) -> bool:
+    return data[:len(STREAM_MAGIC)] == STREAM_MAGIC
+
+
+class DataKeyCache:
+    """Small LRU of unwrapped data keys with a short TTL, keyed by wrapped key"""
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, wrapped_key: bytes) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(wrapped_key)
+            if entry is None:
+                return None
+            expires_at, data_key = entry
+            if expires_at < time.monotonic():
+                del self._entries[wrapped_key]
+                return None
+            self._entries.move_to_end(wrapped_key)
+            return data_key
+
+    def put(self, wrapped_key: bytes, data_key: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[wrapped_key] = (time.monotonic() + self.ttl_seconds, data_key)
+            self._entries.move_to_end(wrapped_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def parse_master_keys(settings: Settings) -> "OrderedDict[str, bytes]":
+    """Configured master keys by id, active key first"""
+    keys: "OrderedDict[str, bytes]" = OrderedDict()
+    if settings.ENCRYPTION_MASTER_KEYS:
+        for entry in settings.ENCRYPTION_MASTER_KEYS.split(","):
+            key_id, _, key = entry.strip().partition(":")
+            if not key_id or not key or len(key_id.encode()) > 255:
+                raise ValueError("ENCRYPTION_MASTER_KEYS entries must be key_id:fernet_key")
+            keys[key_id] = key.encode()
+    elif settings.ENCRYPTION_MASTER_KEY:
+        keys["default"] = settings.ENCRYPTION_MASTER_KEY.encode()
+    if not keys:
+        raise ValueError("ENCRYPTION_MASTER_KEY is not configured")
+    return keys
+
 
 class EncryptionService:
-    def __init__(self, settings: Settings):
-        self.master_key = settings.ENCRYPTION_MASTER_KEY.encode()
-        self.master_fernet = Fernet(self.master_key)
-    
-    def encrypt_content(self, content: str) -> Tuple[str, str]:
-        # Generate a unique key for this content
-        content_key = Fernet.generate_key()
-        content_fernet = Fernet(content_key)
-        
-        # Encrypt the content
-        encrypted_content = content_fernet.encrypt(content.encode())
-        
-        # Encrypt the content key with master key
-        encrypted_key = self.master_fernet.encrypt(content_key)
-        
-        return base64.b64encode(encrypted_content).decode(), base64.b64encode(encrypted_key).decode()
-    
-    def decrypt_content(self, encrypted_content: str, encrypted_key: str) -> str:
-        # Decode from base64
-        encrypted_content_bytes = base64.b64decode(encrypted_content)
-        encrypted_key_bytes = base64.b64decode(encrypted_key)
-        
-        # Decrypt the content key
-        content_key = self.master_fernet.decrypt(encrypted_key_bytes)
-        
-        # Decrypt the content
-        content_fernet = Fernet(content_key)
-        decrypted_content = content_fernet.decrypt(encrypted_content_bytes)
-        
-        return decrypted_content.decode()
\ No newline at end of file
+    """
+    Envelope encryption: each record gets a random AES-256 data key, wrapped by
+    the active master key and tagged with its id. New records use the chunked
+    AES-GCM stream format and are stored as raw bytes; legacy base64(Fernet)
+    records remain readable.
+    """
+    def __init__(
+        self,
+        settings: Settings,
+        key_cache: Optional[DataKeyCache] = None,
+        executor: Optional[BoundedExecutor] = None
+    ):
+        master_keys = parse_master_keys(settings)
+        self.master_fernets: Dict[str, Fernet] = {k: Fernet(v) for k, v in master_keys.items()}
+        self.active_key_id = next(iter(master_keys))
+        self.master_fernet = self.master_fernets[self.active_key_id]
+        # Untagged keys predate key ids; try every master key, active first
+        self._any_master = MultiFernet(list(self.master_fernets.values()))
+        self.chunk_size = settings.ENCRYPTION_CHUNK_SIZE
+        self.key_cache = key_cache or DataKeyCache(
+            settings.ENCRYPTION_KEY_CACHE_SIZE,
+            settings.ENCRYPTION_KEY_CACHE_TTL_SECONDS
+        )
+        self.executor = executor or crypto_executor
+
+    def wrap_data_key(self, data_key: bytes) -> bytes:
+        key_id = self.active_key_id.encode()
+        return KEY_MAGIC + bytes([len(key_id)]) + key_id + self.master_fernet.encrypt(data_key)
+
+    def generate_data_key(self) -> Tuple[bytes, bytes]:
+        """(data key, wrapped data key)"""
+        data_key = AESGCM.generate_key(bit_length=DATA_KEY_SIZE * 8)
+        return data_key, self.wrap_data_key(data_key)
+
+    def key_id_of(self, wrapped_key: bytes) -> Optional[str]:
+        """Master key id a wrapped key is tagged with, None for untagged keys"""
+        if not wrapped_key.startswith(KEY_MAGIC):
+            return None
+        length = wrapped_key[len(KEY_MAGIC)]
+        return wrapped_key[len(KEY_MAGIC) + 1:len(KEY_MAGIC) + 1 + length].decode()
+
+    def unwrap_data_key(self, wrapped_key: Union[bytes, str]) -> bytes:
+        wrapped_key = _as_bytes(wrapped_key)
+        data_key = self.key_cache.get(wrapped_key)
+        if data_key is not None:
+            return data_key
+
+        key_id = self.key_id_of(wrapped_key)
+        if key_id is not None:
+            fernet = self.master_fernets.get(key_id)
+            if fernet is None:
+                raise ValueError(f"Unknown master key id: {key_id}")
+            data_key = fernet.decrypt(wrapped_key[len(KEY_MAGIC) + 1 + len(key_id.encode()):])
+        elif wrapped_key.startswith(b"gAAAA"):
+            data_key = self._any_master.decrypt(wrapped_key)
+        else:
+            data_key = self._any_master.decrypt(base64.b64decode(wrapped_key))
+
+        self.key_cache.put(wrapped_key, data_key)
+        return data_key
+
+    def needs_rewrap(self, wrapped_key: Union[bytes, str]) -> bool:
+        return self.key_id_of(_as_bytes(wrapped_key)) != self.active_key_id
+
+    def rewrap_data_key(self, wrapped_key: Union[bytes, str]) -> bytes:
+        """Re-wrap under the active master key; the ciphertext itself is untouched"""
+        return self.wrap_data_key(self.unwrap_data_key(wrapped_key))
+
+    def encrypt_content(self, content: str) -> Tuple[bytes, bytes]:
+        """(ciphertext, wrapped data key), both raw bytes"""
+        data_key, wrapped_key = self.generate_data_key()
+        return b"".join(encrypt_stream(data_key, [content.encode()], self.chunk_size)), wrapped_key
+
+    def decrypt_content(
+        self,
+        encrypted_content: Union[bytes, str],
+        encrypted_key: Union[bytes, str]
+    ) -> str:
+        encrypted_content = _as_bytes(encrypted_content)
+        data_key = self.unwrap_data_key(encrypted_key)
+        if is_stream_format(encrypted_content):
+            return b"".join(decrypt_stream(data_key, [encrypted_content])).decode()
+        # Legacy records: base64(Fernet token) under a Fernet content key
+        return Fernet(data_key).decrypt(base64.b64decode(encrypted_content)).decode()
+
+    def _decrypt_batch(self, records: Sequence[Tuple[Union[bytes, str], Union[bytes, str]]]) -> List[str]:
+        return [self.decrypt_content(c, k) for c, k in records]
+
+    def _slices(self, records: Sequence) -> List[Sequence]:
+        """One slice per executor worker, to keep per-task overhead low"""
+        step = -(-len(records) // self.executor.max_workers)
+        return [records[i:i + step] for i in range(0, len(records), step)]
+
+    def decrypt_many(
+        self,
+        records: Sequence[Tuple[Union[bytes, str], Union[bytes, str]]]
+    ) -> List[str]:
+        """
+        Decrypt (content, wrapped key) pairs, in order, fanned out over the crypto
+        executor; the OpenSSL primitives release the GIL. Blocking; async callers
+        use decrypt_many_async.
+        """
+        if len(records) < 2 or self.executor.max_workers <= 1:
+            return self._decrypt_batch(records)
+        return [text for batch in self.executor.map(self._decrypt_batch, self._slices(records)) for text in batch]
+
+    def encrypt_chunks(self, chunks: Iterable[bytes]) -> Tuple[bytes, Iterator[bytes]]:
+        """(wrapped data key, ciphertext iterator) for incremental encryption of large bodies"""
+        data_key, wrapped_key = self.generate_data_key()
+        return wrapped_key, encrypt_stream(data_key, chunks, self.chunk_size)
+
+    def decrypt_chunks(self, chunks: Iterable[bytes], wrapped_key: Union[bytes, str]) -> Iterator[bytes]:
+        # Unwrapped through the key cache, so any master key id that is still configured works
+        return decrypt_stream(self.unwrap_data_key(wrapped_key), chunks)
+
+    def encrypt_file(self, source: BinaryIO, destination: BinaryIO) -> bytes:
+        """Encrypt source into destination chunk by chunk; returns the wrapped data key"""
+        wrapped_key, ciphertext = self.encrypt_chunks(_read_chunks(source, self.chunk_size))
+        for chunk in ciphertext:
+            destination.write(chunk)
+        return wrapped_key
+
+    def decrypt_file(self, source: BinaryIO, destination: BinaryIO, wrapped_key: Union[bytes, str]):
+        for chunk in self.decrypt_chunks(_read_chunks(source, self.chunk_size), wrapped_key):
+            destination.write(chunk)
+
+    # Async wrappers: run on the bounded crypto executor, never on the event loop
+
+    async def encrypt_content_async(self, content: str) -> Tuple[bytes, bytes]:
+        return await self.executor.run(self.encrypt_content, content)
+
+    async def decrypt_content_async(
+        self,
+        encrypted_content: Union[bytes, str],
+        encrypted_key: Union[bytes, str]
+    ) -> str:
+        return await self.executor.run(self.decrypt_content, encrypted_content, encrypted_key)
+
+    async def decrypt_many_async(
+        self,
+        records: Sequence[Tuple[Union[bytes, str], Union[bytes, str]]]
+    ) -> List[str]:
+        if not records:
+            return []
+        batches = await asyncio.gather(*(
+            self.executor.run(self._decrypt_batch, batch) for batch in self._slices(records)
+        ))
+        return [text for batch in batches for text in batch]
+
+    async def rewrap_data_keys_async(self, wrapped_keys: Sequence[Union[bytes, str]]) -> List[bytes]:
+        return await self.executor.run(lambda keys: [self.rewrap_data_key(k) for k in keys], wrapped_keys)
+
+
+def _as_bytes(value: Union[bytes, str, memoryview]) -> bytes:
+    if isinstance(value, str):
+        return value.encode()
+    return bytes(value)
+
+
+def _read_chunks(source: BinaryIO, size: int) -> Iterator[bytes]:
+    while True:
+        chunk = source.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+_service: Optional[EncryptionService] = None
+
+
+def get_encryption_service() -> EncryptionService:
+    """Process-wide service so the data key cache and worker threads are shared"""
+    global _service
+    if _service is None:
+        _service = EncryptionService(app_settings)
+    return _service
@@ -4,7 +4,11 @@ from typing import List, Optional
 from app.models.expert import ExpertProfile
 from app.models.question import ExpertResponse
 from app.schemas.expert import ExpertProfileCreate, ExpertProfileUpdate
-from app.schemas.expert_response import ExpertResponseCreate
+from app.schemas.expert_response import ExpertResponseCreate, ExpertResponse as ExpertResponseSchema
+from app.services.expert_stats import ExpertStatsService
+from app.services.match_requests import MatchRequestService
+from app.services.encryption import get_encryption_service
+from app.utils.validator import DataValidator
 import uuid
 from datetime import datetime
 
@@ -15,15 +19,15 @@ class ExpertService:
         profile = ExpertProfile(
             id=uuid.uuid4(),
             user_id=profile_in.user_id,
-            expertise=profile_in.expertise,
+            expertise=DataValidator.normalize_expertise(profile_in.expertise),
             bio=profile_in.bio,
             hourly_rate=profile_in.hourly_rate,
             verification_status='pending',
             background_check_status='pending'
         )
         db.add(profile)
-        await db.commit()
-        await db.refresh(profile)
+        db.commit()
+        db.refresh(profile)
         return profile
 
     async def update_verification_status(
@@ -32,16 +36,17 @@ class ExpertService:
         expert = db.query(ExpertProfile).filter(ExpertProfile.id == expert_id).first()
         if expert:
             expert.verification_status = status
-            await db.commit()
-            await db.refresh(expert)
+            db.commit()
+            db.refresh(expert)
         return expert
 
     async def get_matched_experts(
         self, db: Session, required_expertise: List[str]
     ) -> List[ExpertProfile]:
+        # Served by the GIN index on expertise
         return db.query(ExpertProfile).filter(
             ExpertProfile.verification_status == 'verified',
-            ExpertProfile.expertise.overlap(required_expertise)
+            ExpertProfile.expertise.overlap(DataValidator.normalize_expertise(required_expertise))
         ).all()
     
     async def get_expert_profile(
@@ -69,21 +74,26 @@ class ExpertService:
         if existing_response:
             raise ValueError("Expert has already responded to this question")
 
+        encrypted_response, encrypted_key = await get_encryption_service().encrypt_content_async(
+            response_in.main_response
+        )
         db_response = ExpertResponse(
             id=uuid.uuid4(),
             question_id=question_id,
             expert_id=expert_id,
             test_response=response_in.test_response,
-            main_response_encrypted=response_in.main_response,
-            encryption_key_encrypted="dummy_key",  # Implement actual encryption
+            main_response_encrypted=encrypted_response,
+            encryption_key_encrypted=encrypted_key,
             status="pending",
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
         
         db.add(db_response)
-        await db.commit()
-        await db.refresh(db_response)
+        ExpertStatsService(db).response_created(expert_id)
+        MatchRequestService(db).mark_answered(question_id, expert_id)
+        db.commit()
+        db.refresh(db_response)
         
         return db_response
 
@@ -100,10 +110,26 @@ class ExpertService:
         self,
         db: Session,
         question_id: uuid.UUID
-    ) -> List[ExpertResponse]:
-        return db.query(ExpertResponse).filter(
+    ) -> List[ExpertResponseSchema]:
+        responses = db.query(ExpertResponse).filter(
             ExpertResponse.question_id == question_id
         ).all()
+        contents = await get_encryption_service().decrypt_many_async([
+            (r.main_response_encrypted, r.encryption_key_encrypted) for r in responses
+        ])
+        return [
+            ExpertResponseSchema(
+                id=r.id,
+                question_id=r.question_id,
+                expert_id=r.expert_id,
+                test_response=r.test_response,
+                main_response=content,
+                status=r.status,
+                created_at=r.created_at,
+                updated_at=r.updated_at
+            )
+            for r, content in zip(responses, contents)
+        ]
         
     async def update_expert_profile(
         self,
@@ -114,8 +140,10 @@ class ExpertService:
         expert = db.query(ExpertProfile).filter(ExpertProfile.id == expert_id).first()
         if expert:
             update_data = profile_update.model_dump(exclude_unset=True)
+            if update_data.get('expertise') is not None:
+                update_data['expertise'] = DataValidator.normalize_expertise(update_data['expertise'])
             for field, value in update_data.items():
                 setattr(expert, field, value)
-            await db.commit()
-            await db.refresh(expert)
+            db.commit()
+            db.refresh(expert)
         return expert
\ No newline at end of file
@@ -0,0 +1,156 @@
+# services/expert_stats.py
+from datetime import datetime
+from typing import Optional
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.expert_stats import ExpertStats
+from app.schemas.expert import ExpertDashboardStats
+
+class ExpertStatsService:
+    """
+    Incremental counters behind the expert dashboard.
+    Updates are single upserts that join the caller's transaction (the caller
+    commits), so the dashboard itself is one primary-key read.
+    """
+    RECONCILE_SQL = text("""
+        INSERT INTO expert_stats (
+            expert_id, total_questions_answered, total_earnings, active_sessions,
+            average_rating, rating_count, current_match_requests, updated_at
+        )
+        SELECT u.id,
+               (SELECT count(*) FROM expert_responses r WHERE r.expert_id = u.id),
+               coalesce((
+                   SELECT sum(s.earnings) FROM sessions s
+                   WHERE s.expert_id = u.id AND s.status = 'completed'
+               ), 0),
+               (SELECT count(*) FROM sessions s WHERE s.expert_id = u.id AND s.status = 'active'),
+               coalesce((
+                   SELECT avg(s.rating) FROM sessions s
+                   WHERE s.expert_id = u.id AND s.rating IS NOT NULL
+               ), 0),
+               (SELECT count(*) FROM sessions s WHERE s.expert_id = u.id AND s.rating IS NOT NULL),
+               (SELECT count(*) FROM match_requests m WHERE m.expert_id = u.id AND m.status = 'pending'),
+               now()
+        FROM users u
+        WHERE u.role = 'expert'
+        ON CONFLICT (expert_id) DO UPDATE SET
+            total_questions_answered = excluded.total_questions_answered,
+            total_earnings = excluded.total_earnings,
+            active_sessions = excluded.active_sessions,
+            average_rating = excluded.average_rating,
+            rating_count = excluded.rating_count,
+            current_match_requests = excluded.current_match_requests,
+            updated_at = excluded.updated_at
+    """)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _increment(self, expert_id: uuid.UUID, **deltas):
+        stmt = insert(ExpertStats).values(
+            expert_id=expert_id,
+            updated_at=datetime.utcnow(),
+            **deltas
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExpertStats.expert_id],
+            set_={
+                **{
+                    column: getattr(ExpertStats, column) + getattr(stmt.excluded, column)
+                    for column in deltas
+                },
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        self.db.execute(stmt)
+
+    def session_opened(self, expert_id: uuid.UUID):
+        self._increment(expert_id, active_sessions=1)
+
+    def reserve_session(self, expert_id: uuid.UUID, capacity: int) -> bool:
+        """
+        Count a new active session only while the expert is below capacity.
+        The check and the increment are one conditional upsert, and the row lock
+        is held until the caller commits, so concurrent requests on any worker
+        cannot push an expert past capacity.
+        """
+        stmt = insert(ExpertStats).values(
+            expert_id=expert_id,
+            active_sessions=1,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExpertStats.expert_id],
+            set_={
+                "active_sessions": ExpertStats.active_sessions + 1,
+                "updated_at": stmt.excluded.updated_at
+            },
+            where=ExpertStats.active_sessions < capacity
+        ).returning(ExpertStats.expert_id)
+        return self.db.execute(stmt).first() is not None
+
+    @staticmethod
+    def session_earnings(started_at: datetime, ended_at: datetime, hourly_rate: Optional[float]) -> float:
+        """Earnings for a session, stored on it at close so later rate changes do not rewrite history"""
+        hours = max((ended_at - started_at).total_seconds(), 0) / 3600
+        return hours * (hourly_rate or 0.0)
+
+    def session_closed(self, expert_id: uuid.UUID, earnings: float):
+        self._increment(expert_id, active_sessions=-1, total_earnings=earnings)
+
+    def response_created(self, expert_id: uuid.UUID):
+        self._increment(expert_id, total_questions_answered=1)
+
+    def match_request_changed(self, expert_id: uuid.UUID, delta: int):
+        self._increment(expert_id, current_match_requests=delta)
+
+    def record_rating(self, expert_id: uuid.UUID, rating: float):
+        """Fold one new rating into the running average"""
+        stmt = insert(ExpertStats).values(
+            expert_id=expert_id,
+            average_rating=rating,
+            rating_count=1,
+            updated_at=datetime.utcnow()
+        )
+        # SET expressions see the existing row, so both use the pre-update count
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExpertStats.expert_id],
+            set_={
+                "average_rating": (
+                    ExpertStats.average_rating * ExpertStats.rating_count + stmt.excluded.average_rating
+                ) / (ExpertStats.rating_count + 1),
+                "rating_count": ExpertStats.rating_count + 1,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        self.db.execute(stmt)
+
+    def get_dashboard(self, expert_id: uuid.UUID) -> ExpertDashboardStats:
+        stats = self.db.get(ExpertStats, expert_id)
+        if stats is None:
+            return ExpertDashboardStats(
+                total_questions_answered=0,
+                average_rating=0.0,
+                total_earnings=0.0,
+                current_match_requests=0,
+                active_sessions=0
+            )
+        return ExpertDashboardStats(
+            total_questions_answered=stats.total_questions_answered,
+            average_rating=stats.average_rating,
+            total_earnings=stats.total_earnings,
+            current_match_requests=stats.current_match_requests,
+            active_sessions=stats.active_sessions
+        )
+
+    def reconcile(self):
+        """
+        Recompute every counter from its source table (responses, sessions and
+        match requests) to correct any drift.
+        """
+        self.db.execute(self.RECONCILE_SQL)
+        self.db.commit()
@@ -0,0 +1,206 @@
+# services/job_queue.py
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Postgres-backed job queue processed by in-process worker coroutines.
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several app
+    workers can share one table. A claimed job that is not finished before its
+    visibility timeout becomes claimable again; failures are retried with
+    exponential backoff until max_attempts.
+    """
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        visibility_timeout: int = 300,
+        max_attempts: int = 5,
+        backoff_seconds: float = 5.0
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._handlers: Dict[str, TaskHandler] = {}
+        self._tasks = []
+        self._stopping = asyncio.Event()
+
+    def task(self, name: str):
+        """Register an async handler for a task name"""
+        def decorator(func: TaskHandler) -> TaskHandler:
+            self._handlers[name] = func
+            return func
+        return decorator
+
+    def enqueue(
+        self,
+        db: Session,
+        task: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        run_at: Optional[datetime] = None,
+        max_attempts: Optional[int] = None
+    ) -> Optional[UUID]:
+        """
+        Add a job within the caller's transaction; the caller commits.
+        Returns the new job id, or None when a job with the same idempotency key exists.
+        """
+        stmt = insert(Job).values(
+            task=task,
+            payload=payload,
+            idempotency_key=idempotency_key,
+            run_at=run_at or datetime.utcnow(),
+            max_attempts=max_attempts or self.max_attempts
+        ).on_conflict_do_nothing(
+            index_elements=[Job.idempotency_key]
+        ).returning(Job.id)
+        job_id = db.execute(stmt).scalar()
+        if job_id is not None:
+            metrics.incr("jobs_enqueued", task=task)
+        return job_id
+
+    async def start(self):
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, worker_id: int):
+        while not self._stopping.is_set():
+            try:
+                job = await run_in_threadpool(self._claim_next)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed to claim a job: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job)
+            except Exception as e:
+                # Recording the outcome failed; the job is reclaimed once its lock expires
+                logger.error(f"Job worker {worker_id} failed to finish job {job['id']}: {str(e)}")
+
+    async def _run(self, job: Dict[str, Any]):
+        handler = self._handlers.get(job["task"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for task {job['task']}")
+            await asyncio.wait_for(handler(job["payload"]), timeout=self.visibility_timeout)
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['task']}) failed: {str(e)}")
+            metrics.incr("jobs_failed_attempts", task=job["task"])
+            await run_in_threadpool(self._fail, job, str(e))
+        else:
+            metrics.incr("jobs_completed", task=job["task"])
+            await run_in_threadpool(self._complete, job)
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            job = db.query(Job).filter(
+                or_(
+                    and_(Job.status == "queued", Job.run_at <= now),
+                    and_(Job.status == "running", Job.locked_until < now)
+                )
+            ).order_by(Job.run_at).with_for_update(skip_locked=True).first()
+            if job is None:
+                db.rollback()
+                return None
+
+            job.status = "running"
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=self.visibility_timeout)
+            claimed = {
+                "id": job.id,
+                "task": job.task,
+                "payload": job.payload,
+                "attempts": job.attempts,
+                "max_attempts": job.max_attempts
+            }
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _complete(self, job: Dict[str, Any]):
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(Job).where(Job.id == job["id"], Job.attempts == job["attempts"]).values(
+                    status="done",
+                    locked_until=None,
+                    last_error=None
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail(self, job: Dict[str, Any], error: str):
+        db = self.session_factory()
+        try:
+            if job["attempts"] >= job["max_attempts"]:
+                values = {"status": "failed", "locked_until": None, "last_error": error}
+            else:
+                # Exponential backoff with jitter
+                delay = self.backoff_seconds * (2 ** (job["attempts"] - 1))
+                delay *= random.uniform(0.5, 1.5)
+                values = {
+                    "status": "queued",
+                    "locked_until": None,
+                    "last_error": error,
+                    "run_at": datetime.utcnow() + timedelta(seconds=delay)
+                }
+            # Attempt guard: skip if the job timed out and was re-claimed meanwhile
+            db.execute(
+                update(Job).where(Job.id == job["id"], Job.attempts == job["attempts"]).values(**values)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+job_queue = JobQueue(
+    workers=settings.JOB_QUEUE_WORKERS,
+    poll_interval=settings.JOB_QUEUE_POLL_SECONDS,
+    visibility_timeout=settings.JOB_QUEUE_VISIBILITY_TIMEOUT_SECONDS,
+    max_attempts=settings.JOB_QUEUE_MAX_ATTEMPTS,
+    backoff_seconds=settings.JOB_QUEUE_BACKOFF_SECONDS
+)
@@ -0,0 +1,57 @@
+# services/match_requests.py
+from datetime import datetime
+from typing import Iterable, List
+import uuid
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.match_request import MatchRequest
+from app.services.expert_stats import ExpertStatsService
+
+class MatchRequestService:
+    """
+    Questions offered to matched experts. Each change moves the expert's
+    current_match_requests counter in the same transaction; the caller commits.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+        self.stats = ExpertStatsService(db)
+
+    def open_requests(self, question_id: uuid.UUID, expert_ids: Iterable[uuid.UUID]) -> List[uuid.UUID]:
+        """Offer the question to each expert; returns the experts not already asked"""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "question_id": question_id,
+                "expert_id": expert_id,
+                "status": "pending",
+                "created_at": now,
+                "updated_at": now
+            }
+            for expert_id in dict.fromkeys(expert_ids)
+        ]
+        if not rows:
+            return []
+        stmt = insert(MatchRequest).values(rows).on_conflict_do_nothing(
+            constraint="uq_match_requests_question_expert"
+        ).returning(MatchRequest.expert_id)
+        opened = list(self.db.execute(stmt).scalars())
+        for expert_id in opened:
+            self.stats.match_request_changed(expert_id, 1)
+        return opened
+
+    def mark_answered(self, question_id: uuid.UUID, expert_id: uuid.UUID) -> bool:
+        result = self.db.execute(
+            update(MatchRequest).where(
+                MatchRequest.question_id == question_id,
+                MatchRequest.expert_id == expert_id,
+                MatchRequest.status == "pending"
+            ).values(status="answered", updated_at=datetime.utcnow())
+        )
+        if result.rowcount:
+            self.stats.match_request_changed(expert_id, -1)
+            return True
+        return False
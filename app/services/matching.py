@@ -1,53 +1,71 @@
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Dict, Optional
 from app.models.expert import ExpertProfile
 from app.models.question import Question
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from app.services.availability import availability_index
+from app.services.scoring import ExpertFeatures, ScoringEngine
 import uuid
 
+# Minimum weighted tag similarity for an expert to be considered a match
+MIN_EXPERTISE_SIMILARITY = 0.3
+
 class ExpertMatchingService:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer()
+    def __init__(self, scoring_engine: Optional[ScoringEngine] = None):
+        self.scoring_engine = scoring_engine or ScoringEngine()
     
     async def match_experts(
-        self, db: Session, question_id: uuid.UUID
+        self,
+        db: Session,
+        question_id: uuid.UUID,
+        available_within_hours: Optional[float] = None,
+        budget: Optional[float] = None
+    ) -> List[Dict[str, any]]:
+        # Queries, the availability rebuild and scoring all block; keep them off the event loop
+        return await run_in_threadpool(self.match_experts_sync, db, question_id, available_within_hours, budget)
+
+    def match_experts_sync(
+        self,
+        db: Session,
+        question_id: uuid.UUID,
+        available_within_hours: Optional[float] = None,
+        budget: Optional[float] = None
     ) -> List[Dict[str, any]]:
+        """Ranked experts for a question; blocking, for callers already off the event loop"""
         question = db.query(Question).filter(Question.id == question_id).first()
-        experts = db.query(ExpertProfile).filter(
+        query = db.query(ExpertProfile).filter(
             ExpertProfile.verification_status == 'verified'
-        ).all()
-        
-        # Create expertise vectors
-        expert_texts = [' '.join(expert.expertise) for expert in experts]
-        question_text = ' '.join(question.required_expertise)
-        
-        # Add question text to create combined matrix
-        all_texts = expert_texts + [question_text]
-        tfidf_matrix = self.vectorizer.fit_transform(all_texts)
+        )
+        if available_within_hours is not None:
+            # Narrow candidates by schedule before any similarity scoring; experts
+            # who have not published hours are not filtered out
+            availability_index.ensure_fresh(db)
+            available_ids = availability_index.available_within(available_within_hours)
+            unavailable_ids = availability_index.scheduled() - available_ids
+            if unavailable_ids:
+                query = query.filter(ExpertProfile.id.notin_(unavailable_ids))
+        experts = query.all()
         
-        # Calculate similarities
-        similarities = cosine_similarity(
-            tfidf_matrix[:-1], tfidf_matrix[-1].reshape(1, -1)
-        ).flatten()
-        
-        # Create sorted matches with scores
-        matches = []
-        for expert, similarity in zip(experts, similarities):
-            if similarity > 0.3:  # Minimum similarity threshold
-                matches.append({
-                    'expert': expert,
-                    'similarity_score': float(similarity),
-                    'matching_expertise': self._get_matching_expertise(
-                        expert.expertise,
-                        question.required_expertise
-                    )
-                })
-        
-        return sorted(matches, key=lambda x: x['similarity_score'], reverse=True)
-    
-    def _get_matching_expertise(
-        self, expert_expertise: List[str], required_expertise: List[str]
-    ) -> List[str]:
-        return list(set(expert_expertise) & set(required_expertise))
+        if not experts:
+            return []
+
+        # Score every candidate at once: weighted tags, rating, load and rate fit
+        features = ExpertFeatures(experts)
+        required_expertise = getattr(question, 'required_expertise', None) or features.tags_in_text(question.content)
+        query_vector = features.query_vector(required_expertise)
+        ranked = self.scoring_engine.rank(
+            features,
+            query_vector,
+            budget=budget,
+            min_expertise=MIN_EXPERTISE_SIMILARITY
+        )
+
+        return [
+            {
+                'expert': experts[index],
+                'score': score,
+                'similarity_score': similarity,
+                'matching_expertise': features.matching_tags(index, required_expertise)
+            }
+            for index, score, similarity in ranked
+        ]
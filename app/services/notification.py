@@ -1,9 +1,144 @@
+from sqlalchemy import func, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from typing import Optional, List
-from app.models.notification import Notification
+from typing import Any, Dict, Optional, List, Set, Tuple
+from collections import Counter, defaultdict
+from fastapi import WebSocket
+from app.core.config import settings
+from app.models.notification import Notification, NotificationCounter
+from app.schemas.notification import NotificationCreate, NotificationPage, NotificationResponse
+import asyncio
+import base64
+import json
+import logging
+import random
 import uuid
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement for bulk fan-out
+INSERT_CHUNK_SIZE = 1000
+MAX_PAGE_SIZE = 100
+# Resubscribe backoff for the Redis listener
+LISTEN_BACKOFF_SECONDS = 1.0
+LISTEN_MAX_BACKOFF_SECONDS = 30.0
+
+
+def encode_cursor(created_at: datetime, notification_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{notification_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Inverse of encode_cursor; raises ValueError for malformed input"""
+    try:
+        created_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(notification_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class NotificationHub:
+    """
+    Live delivery over per-user WebSocket channels.
+    Each process holds the sockets it accepted; with Redis configured, batches are
+    published on one pub/sub channel so every worker delivers to its own sockets.
+    Users with no open socket pick notifications up on their next poll.
+    """
+    CHANNEL = "notifications"
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url
+        self._connections: Dict[str, Set[WebSocket]] = defaultdict(set)
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def connect(self, user_id: uuid.UUID, websocket: WebSocket):
+        await websocket.accept()
+        self._connections[str(user_id)].add(websocket)
+
+    def disconnect(self, user_id: uuid.UUID, websocket: WebSocket):
+        sockets = self._connections.get(str(user_id))
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._connections[str(user_id)]
+
+    async def start(self):
+        if not self.redis_url or self._listener is not None:
+            return
+        from redis import asyncio as aioredis
+        self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen(self):
+        """Deliver published batches; on any Redis error resubscribe with jittered backoff"""
+        delay = LISTEN_BACKOFF_SECONDS
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                delay = LISTEN_BACKOFF_SECONDS
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        await self._deliver(json.loads(message["data"]))
+                    except Exception as e:
+                        logger.error(f"Failed to deliver notification batch: {str(e)}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Notification listener lost Redis, resubscribing in {delay:.0f}s: {str(e)}")
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, LISTEN_MAX_BACKOFF_SECONDS)
+
+    async def publish(self, messages: List[Dict[str, Any]]):
+        """Deliver messages (each carrying a user_id) to every connected recipient"""
+        if not messages:
+            return
+        if self._redis is not None:
+            try:
+                await self._redis.publish(self.CHANNEL, json.dumps(messages))
+                return
+            except Exception as e:
+                logger.warning(f"Notification publish failed, delivering locally: {str(e)}")
+        await self._deliver(messages)
+
+    async def _deliver(self, messages: List[Dict[str, Any]]):
+        sends = []
+        for message in messages:
+            for websocket in list(self._connections.get(message["user_id"], ())):
+                sends.append((message["user_id"], websocket, websocket.send_json(message)))
+        if not sends:
+            return
+        results = await asyncio.gather(*(send for _, _, send in sends), return_exceptions=True)
+        for (user_id, websocket, _), result in zip(sends, results):
+            if isinstance(result, Exception):
+                self.disconnect(user_id, websocket)
+
+
+notification_hub = NotificationHub(settings.REDIS_URL if settings.REDIS_HOST else None)
+
+
 class NotificationService:
     async def create_notification(
         self,
@@ -13,49 +148,175 @@ class NotificationService:
         content: str,
         notification_type: str
     ) -> Notification:
-        notification = Notification(
-            id=uuid.uuid4(),
+        notifications = await self.create_notifications(db, [NotificationCreate(
             user_id=user_id,
             title=title,
             content=content,
             type=notification_type
+        )])
+        return notifications[0]
+
+    async def create_notifications(
+        self,
+        db: Session,
+        notifications: List[NotificationCreate]
+    ) -> List[Notification]:
+        """
+        Insert a batch of notifications in one transaction (one statement per
+        INSERT_CHUNK_SIZE rows), then push them to connected recipients
+        """
+        rows = self.insert_notifications(db, notifications)
+        db.commit()
+        await self.publish(rows)
+        return [Notification(**row) for row in rows]
+
+    def insert_notifications(
+        self,
+        db: Session,
+        notifications: List[NotificationCreate]
+    ) -> List[Dict[str, Any]]:
+        """
+        Insert notifications and bump unread counters within the caller's
+        transaction; the caller commits, then publishes the returned rows.
+        Notifications whose fixed id already exists are skipped and not returned.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": n.id or uuid.uuid4(),
+                "user_id": n.user_id,
+                "title": n.title,
+                "content": n.content,
+                "type": n.type,
+                "is_read": False,
+                "created_at": now,
+                "updated_at": now
+            }
+            for n in notifications
+        ]
+        inserted = set()
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            stmt = insert(Notification).values(rows[start:start + INSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Notification.id]).returning(Notification.id)
+            inserted.update(db.execute(stmt).scalars())
+        rows = [row for row in rows if row["id"] in inserted]
+        self._increment_unread(db, Counter(row["user_id"] for row in rows))
+        return rows
+
+    async def publish(self, rows: List[Dict[str, Any]]):
+        """Push inserted notification rows to their connected recipients"""
+        await notification_hub.publish([
+            {
+                "id": str(row["id"]),
+                "user_id": str(row["user_id"]),
+                "title": row["title"],
+                "content": row["content"],
+                "type": row["type"],
+                "created_at": row["created_at"].isoformat()
+            }
+            for row in rows
+        ])
+
+    def _increment_unread(self, db: Session, counts: Dict[uuid.UUID, int]):
+        """Add per-user unread counts in one upsert; joins the caller's transaction"""
+        if not counts:
+            return
+        now = datetime.utcnow()
+        stmt = insert(NotificationCounter).values([
+            {"user_id": user_id, "unread": count, "updated_at": now}
+            for user_id, count in counts.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={
+                "unread": NotificationCounter.unread + stmt.excluded.unread,
+                "updated_at": stmt.excluded.updated_at
+            }
         )
-        
-        db.add(notification)
-        await db.commit()
-        await db.refresh(notification)
-        
-        # Trigger real-time notification if applicable
-        await self._send_realtime_notification(notification)
-        return notification
-    
+        db.execute(stmt)
+
     async def get_user_notifications(
         self,
         db: Session,
         user_id: uuid.UUID,
-        unread_only: bool = False
-    ) -> List[Notification]:
+        unread_only: bool = False,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> NotificationPage:
+        """
+        Newest first, keyset-paginated on (created_at, id).
+        Pass the returned next_cursor to get the following page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
         query = db.query(Notification).filter(Notification.user_id == user_id)
         if unread_only:
             query = query.filter(Notification.is_read == False)
-        return query.order_by(Notification.created_at.desc()).all()
-    
+        if cursor:
+            created_at, notification_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(Notification.created_at, Notification.id) < tuple_(created_at, notification_id)
+            )
+        rows = query.order_by(
+            Notification.created_at.desc(), Notification.id.desc()
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return NotificationPage(
+            items=[NotificationResponse.model_validate(n) for n in rows],
+            next_cursor=next_cursor
+        )
+
+    async def get_unread_count(self, db: Session, user_id: uuid.UUID) -> int:
+        counter = db.get(NotificationCounter, user_id)
+        return counter.unread if counter else 0
+
     async def mark_as_read(
         self,
         db: Session,
-        notification_id: uuid.UUID
+        notification_id: uuid.UUID,
+        user_id: uuid.UUID
     ) -> Optional[Notification]:
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id
+        # Conditional update so the counter only moves when the row actually flips
+        flipped = db.execute(
+            update(Notification)
+            .where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            )
+            .values(is_read=True, updated_at=datetime.utcnow())
+        ).rowcount
+        if flipped:
+            db.execute(
+                update(NotificationCounter)
+                .where(NotificationCounter.user_id == user_id, NotificationCounter.unread > 0)
+                .values(unread=NotificationCounter.unread - 1, updated_at=datetime.utcnow())
+            )
+        db.commit()
+
+        return db.query(Notification).filter(
+            Notification.id == notification_id,
+            Notification.user_id == user_id
         ).first()
-        
-        if notification:
-            notification.is_read = True
-            await db.commit()
-            await db.refresh(notification)
-        
-        return notification
-    
-    async def _send_realtime_notification(self, notification: Notification):
-        # Implement WebSocket notification here
-        pass
\ No newline at end of file
+
+    async def mark_all_read(self, db: Session, user_id: uuid.UUID) -> int:
+        """Mark every unread notification read in one UPDATE; returns how many changed"""
+        now = datetime.utcnow()
+        updated = db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read == False)
+            .values(is_read=True, updated_at=now)
+        ).rowcount
+        if updated:
+            # Subtract what this UPDATE flipped rather than zeroing, so notifications
+            # inserted concurrently stay counted
+            db.execute(
+                update(NotificationCounter)
+                .where(NotificationCounter.user_id == user_id)
+                .values(unread=func.greatest(NotificationCounter.unread - updated, 0), updated_at=now)
+            )
+        db.commit()
+        return updated
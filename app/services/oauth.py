@@ -0,0 +1,203 @@
+# services/oauth.py
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from authlib.integrations.starlette_client import OAuth
+from authlib.jose import JoseError, JsonWebKey, JsonWebToken, KeySet
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+# Google signs ID tokens with RS256 only; anything else is rejected before key lookup
+GOOGLE_ALGORITHMS = ["RS256"]
+google_jwt = JsonWebToken(GOOGLE_ALGORITHMS)
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def cache_lifetime(response: httpx.Response) -> Optional[float]:
+    """Seconds the response stays fresh per Cache-Control max-age minus Age, if given"""
+    match = MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+    if not match:
+        return None
+    try:
+        age = float(response.headers.get("age", 0))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+class OAuthRegistry:
+    """
+    Application-scoped authlib registry. Clients are registered once, and each
+    provider's discovery document and JWKS are kept in the client's
+    server_metadata, where authlib looks before going to the network. A
+    background task refreshes them when the JWKS response's Cache-Control
+    says they go stale, and at least every OAUTH_METADATA_REFRESH_SECONDS, so
+    login redirects and callbacks never wait on discovery or key fetches.
+    Google ID tokens are verified locally against the cached keys.
+    """
+    def __init__(self, refresh_seconds: int = settings.OAUTH_METADATA_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.oauth = OAuth()
+        self.oauth.register(
+            name='google',
+            client_id=settings.GOOGLE_CLIENT_ID,
+            client_secret=settings.GOOGLE_CLIENT_SECRET,
+            authorize_state=settings.SECRET_KEY,
+            server_metadata_url=GOOGLE_DISCOVERY_URL,
+            client_kwargs={
+                'scope': 'profile openid email',
+                'redirect_url': settings.GOOGLE_REDIRECT_URI
+            }
+        )
+        self.oauth.register(
+            name='linkedin',
+            client_id=settings.LINKEDIN_CLIENT_ID,
+            client_secret=settings.LINKEDIN_CLIENT_SECRET,
+            api_base_url='https://api.linkedin.com/v2/',
+            authorize_url='https://www.linkedin.com/oauth/v2/authorization',
+            access_token_url='https://www.linkedin.com/oauth/v2/accessToken',
+            jwks_uri="https://www.linkedin.com/oauth/openid/jwks",
+            client_kwargs={
+                'scope': 'openid profile email',
+                'redirect_url': settings.LINKEDIN_REDIRECT_URI
+            }
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self._key_sets: Dict[str, KeySet] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._last_refresh = 0.0
+        self._wake = asyncio.Event()
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def google(self):
+        return self.oauth.google
+
+    @property
+    def linkedin(self):
+        return self.oauth.linkedin
+
+    async def _get(self, url: str) -> httpx.Response:
+        response = await self._http.get(url)
+        response.raise_for_status()
+        return response
+
+    async def refresh_provider(self, name: str):
+        client = self.oauth.create_client(name)
+        metadata = {}
+        if client._server_metadata_url:
+            metadata = (await self._get(client._server_metadata_url)).json()
+            metadata['_loaded_at'] = time.time()
+        jwks_uri = metadata.get('jwks_uri') or client.server_metadata.get('jwks_uri')
+        if jwks_uri:
+            response = await self._get(jwks_uri)
+            metadata['jwks'] = response.json()
+            self._key_sets[name] = JsonWebKey.import_key_set(metadata['jwks'])
+            lifetime = cache_lifetime(response)
+            if lifetime is not None:
+                self._expires_at[name] = time.time() + lifetime
+        # One update, so requests never see discovery data without matching keys
+        client.server_metadata.update(metadata)
+
+    async def refresh(self):
+        async with self._refresh_lock:
+            self._last_refresh = time.time()
+            for name in ('google', 'linkedin'):
+                try:
+                    await self.refresh_provider(name)
+                    metrics.incr("oauth_metadata_refreshes", provider=name)
+                except Exception as e:
+                    # Keep serving the previous metadata; authlib fetches on demand if there is none
+                    logger.warning(f"Failed to refresh {name} OAuth metadata: {str(e)}")
+                    metrics.incr("oauth_metadata_refresh_errors", provider=name)
+
+    def _next_refresh_delay(self) -> float:
+        delay = float(self.refresh_seconds)
+        for expires_at in self._expires_at.values():
+            delay = min(delay, expires_at - time.time())
+        return max(delay, settings.OAUTH_MIN_REFRESH_SECONDS)
+
+    def request_refresh(self):
+        """Wake the refresher early, e.g. for a token signed with a key we have not seen"""
+        if time.time() - self._last_refresh >= settings.OAUTH_MIN_REFRESH_SECONDS:
+            self._wake.set()
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh()
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._next_refresh_delay())
+            except asyncio.TimeoutError:
+                pass
+
+    async def verify_google_id_token(self, token: str) -> Dict:
+        """
+        Verify signature, issuer, audience and expiry of a Google ID token using
+        the cached key set. Only a process that has never loaded the keys waits
+        for a fetch. Raises ValueError when the token is not valid.
+        """
+        key_set = self._key_sets.get('google')
+        if key_set is None:
+            await self.refresh()
+            key_set = self._key_sets.get('google')
+            if key_set is None:
+                raise ValueError("Google signing keys are unavailable")
+
+        def find_key(header, payload):
+            if header.get('alg') not in GOOGLE_ALGORITHMS:
+                raise ValueError(f"Unsupported token algorithm: {header.get('alg')}")
+            try:
+                return key_set.find_by_kid(header.get('kid'))
+            except ValueError:
+                # Google rotated its keys ahead of our schedule
+                self.request_refresh()
+                raise
+
+        try:
+            claims = google_jwt.decode(
+                token,
+                find_key,
+                claims_options={
+                    'iss': {'essential': True, 'values': GOOGLE_ISSUERS},
+                    'aud': {'essential': True, 'value': settings.GOOGLE_CLIENT_ID},
+                }
+            )
+            claims.validate(leeway=settings.OAUTH_CLOCK_SKEW_SECONDS)
+        except (JoseError, KeyError, TypeError, ValueError) as e:
+            # Malformed tokens surface from authlib as assorted errors; callers expect ValueError
+            raise ValueError(str(e) or type(e).__name__)
+        return dict(claims)
+
+    async def start(self):
+        if self._refresher is not None:
+            return
+        self._http = httpx.AsyncClient(timeout=settings.OAUTH_HTTP_TIMEOUT_SECONDS)
+        # Warm in the background; startup does not wait on the providers
+        self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+oauth_registry = OAuthRegistry()
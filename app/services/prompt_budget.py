@@ -0,0 +1,128 @@
+# services/prompt_budget.py
+import io
+import re
+import textwrap
+from functools import lru_cache
+from typing import List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - falls back to a character estimate
+    tiktoken = None
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:  # pragma: no cover - images are passed through unchanged
+    Image = None
+
+# Rough characters-per-token ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[... truncated ...]\n"
+
+
+class InvalidImageError(ValueError):
+    """Image bytes that cannot be decoded"""
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Claude and unknown models: o200k is a close enough approximation for budgeting
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count (or estimate) the number of tokens in text for the given model"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Shorten text to at most max_tokens, keeping the head and the tail.
+    The start of a question usually carries the context and the end the actual ask,
+    so the middle is what gets dropped.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    marker_tokens = count_tokens(TRUNCATION_MARKER, model)
+    keep = max(max_tokens - marker_tokens, 0)
+    head_tokens = keep * 2 // 3
+    tail_tokens = keep - head_tokens
+
+    encoding = _get_encoding(model)
+    if encoding is None:
+        head = text[:head_tokens * CHARS_PER_TOKEN]
+        tail = text[len(text) - tail_tokens * CHARS_PER_TOKEN:] if tail_tokens else ""
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        head = encoding.decode(tokens[:head_tokens])
+        tail = encoding.decode(tokens[len(tokens) - tail_tokens:]) if tail_tokens else ""
+    return head + TRUNCATION_MARKER + tail
+
+
+def compact_prompt(prompt: str) -> str:
+    """Strip indentation and collapse blank lines / repeated spaces in a prompt"""
+    prompt = textwrap.dedent(prompt).strip()
+    prompt = re.sub(r"[ \t]+", " ", prompt)
+    prompt = re.sub(r"\n\s*\n+", "\n", prompt)
+    return prompt
+
+
+def downscale_image(
+    img_data: bytes,
+    max_bytes: int,
+    max_side: int,
+    min_quality: int = 40
+) -> Optional[bytes]:
+    """
+    Re-encode an image as JPEG so it fits within max_bytes.
+    Resizes to max_side first, then steps JPEG quality and size down until it fits.
+    Returns None if the image cannot be brought under budget; raises
+    InvalidImageError if it is not a readable image. CPU-bound, so call it from
+    a worker thread.
+    """
+    if Image is None:
+        return img_data if len(img_data) <= max_bytes else None
+
+    try:
+        image = Image.open(io.BytesIO(img_data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidImageError(f"Unsupported or corrupt image: {str(e)}") from e
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((max_side, max_side))
+
+    quality = 85
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        if buffer.tell() <= max_bytes:
+            return buffer.getvalue()
+        if quality > min_quality:
+            quality -= 15
+            continue
+        width, height = image.size
+        if max(width, height) <= 64:
+            return None
+        image = image.resize((max(width * 3 // 4, 1), max(height * 3 // 4, 1)))
+
+
+def prepare_images(imgs: Optional[List[bytes]], max_bytes: int, max_side: int) -> List[bytes]:
+    """Downscale every image to the byte budget, dropping the ones that cannot fit"""
+    prepared = []
+    for img_data in imgs or []:
+        resized = downscale_image(img_data, max_bytes, max_side)
+        if resized is not None:
+            prepared.append(resized)
+    return prepared
@@ -1,14 +1,23 @@
 # services/question_service.py
-from sqlalchemy import and_
+import csv
+import io
+import uuid
+from sqlalchemy import and_, insert
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 from fastapi import HTTPException, status
 from datetime import datetime
+from starlette.concurrency import run_in_threadpool
 from app.models.question import Question
 from app.schemas.question import *
 from app.services.ai_service import AIService
 
+# Batches at least this large are loaded with COPY instead of INSERT ... VALUES
+COPY_THRESHOLD = 5000
+# Rows per multi-row INSERT; keeps bind parameters well under Postgres' 65535 limit
+INSERT_CHUNK_SIZE = 1000
+
 class QuestionService:
     def __init__(self, db: Session):
         self.db = db
@@ -17,32 +26,71 @@ class QuestionService:
         self,
         client_id: UUID,
         final_content: List[str]
-    ) -> List[str]:
-        """Efficiently create multiple verified questions in a single transaction"""
+    ) -> List[QuestionCreated]:
+        """
+        Efficiently create multiple verified questions. Joins the caller's
+        transaction; the caller commits, so follow-up work such as enqueued jobs
+        lands atomically with the rows.
+        """
         
         try:
-            # Prepare all question objects
-            questions = [
-                Question(
-                    client_id=client_id,
-                    content=q,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow(),
-                )
-                for q in final_content
-            ]
-            
-            # Bulk insert
-            #print(final_content)
-            self.db.bulk_save_objects(questions)
-            
-            self.db.commit()
-            # Return created questions
-            return final_content
+            # The database round trips are blocking, keep them off the event loop
+            return await run_in_threadpool(self._insert_questions, client_id, final_content)
             
         except Exception as e:
             self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to save questions: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    def _insert_questions(self, client_id: UUID, contents: List[str]) -> List[QuestionCreated]:
+        if not contents:
+            return []
+
+        now = datetime.utcnow()
+        if len(contents) >= COPY_THRESHOLD and self.db.bind.dialect.name == "postgresql":
+            created = self._copy_questions(client_id, contents, now)
+        else:
+            created = []
+            for start in range(0, len(contents), INSERT_CHUNK_SIZE):
+                chunk = contents[start:start + INSERT_CHUNK_SIZE]
+                stmt = insert(Question).values([
+                    {"client_id": client_id, "content": q, "created_at": now, "updated_at": now}
+                    for q in chunk
+                ]).returning(Question.id, Question.content, Question.created_at)
+                created.extend(
+                    QuestionCreated(id=row.id, content=row.content, created_at=row.created_at)
+                    for row in self.db.execute(stmt)
+                )
+
+        return created
+
+    def _copy_questions(
+        self,
+        client_id: UUID,
+        contents: List[str],
+        now: datetime
+    ) -> List[QuestionCreated]:
+        """Stream rows through COPY; ids are generated here since COPY cannot return them"""
+        created = [
+            QuestionCreated(id=uuid.uuid4(), content=q, created_at=now)
+            for q in contents
+        ]
+        buffer = io.StringIO()
+        # COPY ... CSV reads an unquoted empty field as NULL; quoting keeps empty content ''
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        timestamp = now.isoformat()
+        for q in created:
+            writer.writerow([str(q.id), str(client_id), q.content, timestamp, timestamp])
+        buffer.seek(0)
+
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY questions (id, client_id, content, created_at, updated_at) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+        return created
@@ -0,0 +1,171 @@
+# services/scoring.py
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+ScoringFunction = Callable[["ExpertFeatures", np.ndarray, Optional[float]], np.ndarray]
+
+# Registry of named scoring components; each returns one score per expert in [0, 1]
+SCORING_FUNCTIONS: Dict[str, ScoringFunction] = {}
+
+DEFAULT_WEIGHTS = {
+    "expertise": 0.6,
+    "rating": 0.2,
+    "load": 0.1,
+    "rate_fit": 0.1,
+}
+
+
+# Words, keeping tags like "c++", "c#" and "node.js" whole; trailing punctuation is dropped
+TOKEN_RE = re.compile(r"[\w+#]+(?:[.\-][\w+#]+)*")
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    return tuple(TOKEN_RE.findall(text.lower()))
+
+
+def scoring_function(name: str):
+    """Register a scoring component under name"""
+    def decorator(func: ScoringFunction) -> ScoringFunction:
+        SCORING_FUNCTIONS[name] = func
+        return func
+    return decorator
+
+
+class ExpertFeatures:
+    """
+    Column-oriented view of a set of experts.
+    Expertise becomes a sparse row-normalized (experts x tags) matrix holding each
+    expert's per-tag weight (1.0 when none is set), so tag similarity for all
+    experts is a single matrix-vector product.
+    """
+    def __init__(self, experts: List):
+        self.experts = experts
+        self.vocabulary: Dict[str, int] = {}
+        rows, cols, values = [], [], []
+        for row, expert in enumerate(experts):
+            weights = {k.lower(): v for k, v in (getattr(expert, "expertise_weights", None) or {}).items()}
+            for tag in expert.expertise or []:
+                tag = tag.lower()
+                col = self.vocabulary.setdefault(tag, len(self.vocabulary))
+                rows.append(row)
+                cols.append(col)
+                values.append(max(float(weights.get(tag, 1.0)), 0.0))
+
+        rows = np.array(rows, dtype=np.int64)
+        values = np.array(values, dtype=np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(experts)))
+        values = np.divide(values, norms[rows], out=np.zeros_like(values), where=norms[rows] > 0)
+        self.tag_matrix = csr_matrix(
+            (values, (rows, np.array(cols, dtype=np.int64))),
+            shape=(len(experts), len(self.vocabulary)),
+            dtype=np.float32
+        )
+
+        self.rating = np.array([e.rating or 0.0 for e in experts], dtype=np.float32)
+        self.load = np.array([e.total_questions or 0 for e in experts], dtype=np.float32)
+        self.hourly_rate = np.array([e.hourly_rate or 0.0 for e in experts], dtype=np.float32)
+
+    def query_vector(self, tags: Iterable[str]) -> np.ndarray:
+        """Unit vector over the vocabulary for the requested tags (unknown tags are ignored)"""
+        query = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for tag in tags:
+            col = self.vocabulary.get(tag.lower())
+            if col is not None:
+                query[col] = 1.0
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def tags_in_text(self, content: str) -> List[str]:
+        """Known expertise tags mentioned in free text, matched on whole words ("ai" is not in "said")"""
+        tokens = tokenize(content)
+        tag_tokens = {tag: tokenize(tag) for tag in self.vocabulary}
+        longest = max((len(t) for t in tag_tokens.values()), default=0)
+        phrases = {
+            tokens[start:start + size]
+            for size in range(1, longest + 1)
+            for start in range(len(tokens) - size + 1)
+        }
+        return [tag for tag, parts in tag_tokens.items() if parts and parts in phrases]
+
+    def matching_tags(self, index: int, tags: Iterable[str]) -> List[str]:
+        expert_tags = {t.lower() for t in self.experts[index].expertise or []}
+        return [t for t in tags if t.lower() in expert_tags]
+
+
+@scoring_function("expertise")
+def expertise_score(features: ExpertFeatures, query: np.ndarray, budget: Optional[float]) -> np.ndarray:
+    """Cosine similarity between weighted expert tags and the requested tags"""
+    return features.tag_matrix @ query
+
+
+@scoring_function("rating")
+def rating_score(features: ExpertFeatures, query: np.ndarray, budget: Optional[float]) -> np.ndarray:
+    return np.clip(features.rating / 5.0, 0.0, 1.0)
+
+
+@scoring_function("load")
+def load_score(features: ExpertFeatures, query: np.ndarray, budget: Optional[float]) -> np.ndarray:
+    """Favor experts with fewer questions already taken"""
+    return 1.0 / (1.0 + np.log1p(features.load))
+
+
+@scoring_function("rate_fit")
+def rate_fit_score(features: ExpertFeatures, query: np.ndarray, budget: Optional[float]) -> np.ndarray:
+    """1 at or under budget, decaying as the hourly rate exceeds it; neutral without a budget"""
+    if not budget:
+        return np.ones(len(features.experts), dtype=np.float32)
+    overshoot = np.maximum(features.hourly_rate - budget, 0.0) / budget
+    return np.exp(-overshoot ** 2)
+
+
+class ScoringEngine:
+    """Weighted sum of registered scoring components"""
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = weights or DEFAULT_WEIGHTS
+        unknown = set(self.weights) - set(SCORING_FUNCTIONS)
+        if unknown:
+            raise ValueError(f"Unknown scoring functions: {', '.join(sorted(unknown))}")
+
+    def components(
+        self,
+        features: ExpertFeatures,
+        query: np.ndarray,
+        budget: Optional[float] = None
+    ) -> Dict[str, np.ndarray]:
+        return {name: SCORING_FUNCTIONS[name](features, query, budget) for name in self.weights}
+
+    def _combine(self, components: Dict[str, np.ndarray]) -> np.ndarray:
+        names = list(self.weights)
+        weights = np.array([self.weights[n] for n in names], dtype=np.float32)
+        return weights @ np.vstack([components[n] for n in names])
+
+    def score(
+        self,
+        features: ExpertFeatures,
+        query: np.ndarray,
+        budget: Optional[float] = None
+    ) -> np.ndarray:
+        return self._combine(self.components(features, query, budget))
+
+    def rank(
+        self,
+        features: ExpertFeatures,
+        query: np.ndarray,
+        budget: Optional[float] = None,
+        top_k: Optional[int] = None,
+        min_expertise: float = 0.0
+    ) -> List[Tuple[int, float, float]]:
+        """(expert index, combined score, expertise score) best first"""
+        components = self.components(features, query, budget)
+        scores = self._combine(components)
+        expertise = components["expertise"] if "expertise" in components else expertise_score(features, query, budget)
+
+        candidates = np.flatnonzero(expertise >= min_expertise)
+        if top_k is not None and top_k < len(candidates):
+            # Partial selection first so only the top_k get fully sorted
+            candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i]), float(expertise[i])) for i in order]
@@ -0,0 +1,115 @@
+# services/search.py
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.question import Question
+from app.schemas.question import QuestionSearchPage, QuestionSearchResult
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(content: str) -> List[str]:
+    return _TOKEN_RE.findall(content.lower())
+
+
+class InvertedIndex:
+    """Small in-memory TF-IDF inverted index, used where Postgres full-text search is unavailable"""
+    def __init__(self):
+        self.postings: Dict[str, Dict[UUID, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[UUID, int] = {}
+
+    def add(self, doc_id: UUID, content: str):
+        tokens = tokenize(content)
+        self.doc_lengths[doc_id] = len(tokens)
+        for token, count in Counter(tokens).items():
+            self.postings[token][doc_id] = count
+
+    def search(self, query: str) -> List[Tuple[UUID, float]]:
+        """Documents containing any query term, best first"""
+        doc_count = len(self.doc_lengths)
+        scores: Dict[UUID, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + doc_count / len(postings))
+            for doc_id, count in postings.items():
+                scores[doc_id] += idf * count / self.doc_lengths[doc_id]
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class QuestionSearchService:
+    # Postgres path: tsvector match ranked by ts_rank_cd, with trigram similarity
+    # catching typos and partial words the stemmer misses
+    SEARCH_SQL = text("""
+        SELECT id, content, created_at,
+               greatest(ts_rank_cd(search_vector, query), similarity(content, :q)) AS rank
+        FROM questions, websearch_to_tsquery('english', :q) AS query
+        WHERE client_id = :client_id
+          AND (search_vector @@ query OR content % :q)
+        ORDER BY rank DESC, created_at DESC
+        LIMIT :limit OFFSET :offset
+    """)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(
+        self,
+        client_id: UUID,
+        query: str,
+        page: int = 1,
+        page_size: int = 20
+    ) -> QuestionSearchPage:
+        offset = (page - 1) * page_size
+        # Fetch one extra row to know whether another page exists without a COUNT(*)
+        if self.db.bind.dialect.name == "postgresql":
+            rows = self.db.execute(self.SEARCH_SQL, {
+                "q": query,
+                "client_id": client_id,
+                "limit": page_size + 1,
+                "offset": offset
+            }).all()
+            results = [
+                QuestionSearchResult(id=r.id, content=r.content, created_at=r.created_at, rank=r.rank)
+                for r in rows
+            ]
+        else:
+            results = self._search_in_memory(client_id, query, offset, page_size + 1)
+
+        return QuestionSearchPage(
+            items=results[:page_size],
+            page=page,
+            page_size=page_size,
+            has_more=len(results) > page_size
+        )
+
+    def _search_in_memory(
+        self,
+        client_id: UUID,
+        query: str,
+        offset: int,
+        limit: int
+    ) -> List[QuestionSearchResult]:
+        questions = {
+            q.id: q for q in self.db.query(Question).filter(Question.client_id == client_id)
+        }
+        index = InvertedIndex()
+        for question in questions.values():
+            index.add(question.id, question.content)
+
+        return [
+            QuestionSearchResult(
+                id=doc_id,
+                content=questions[doc_id].content,
+                created_at=questions[doc_id].created_at,
+                rank=score
+            )
+            for doc_id, score in index.search(query)[offset:offset + limit]
+        ]
@@ -0,0 +1,190 @@
+# services/tasks.py
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+import hashlib
+import uuid
+
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import SessionLocal
+from app.services.job_queue import job_queue
+from app.services.notification import NotificationService
+from app.services.expert_stats import ExpertStatsService
+from app.services.match_requests import MatchRequestService
+from app.services.matching import ExpertMatchingService
+from app.schemas.notification import NotificationCreate
+from app.services.encryption import get_encryption_service
+from app.models.question import ExpertResponse
+from app.services.background_checks import BackgroundCheckPoller
+from app.core.config import settings
+
+def questions_verified_key(question_ids: List[str]) -> str:
+    """Idempotency key for a question.verified job: the saved rows, not their texts"""
+    digest = hashlib.sha256(",".join(sorted(question_ids)).encode()).hexdigest()
+    return f"question.verified:{digest}"
+
+def _open_match_requests(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        matching_service = ExpertMatchingService()
+        match_requests = MatchRequestService(db)
+        offers = []
+        for question_id in payload["questions"]:
+            matches = matching_service.match_experts_sync(
+                db,
+                uuid.UUID(question_id),
+                available_within_hours=settings.MATCH_REQUEST_AVAILABLE_WITHIN_HOURS
+            )
+            expert_ids = [m['expert'].user_id for m in matches[:settings.MATCH_REQUESTS_PER_QUESTION]]
+            # Retried jobs skip experts already asked, so nobody is notified twice
+            offers.extend(match_requests.open_requests(uuid.UUID(question_id), expert_ids))
+
+        count = len(payload["questions"])
+        notifications = [NotificationCreate(
+            # Same id on every attempt, so a retry after the commit does not notify again
+            id=uuid.uuid5(uuid.NAMESPACE_URL, questions_verified_key(payload["questions"])),
+            user_id=payload["client_id"],
+            title="Questions received",
+            content=f"{count} question(s) saved. We are matching you with experts.",
+            type="question_verified"
+        )]
+        notifications.extend(
+            NotificationCreate(
+                user_id=expert_id,
+                title="New match request",
+                content="A new question matches your expertise.",
+                type="match_request"
+            )
+            for expert_id in offers
+        )
+        rows = NotificationService().insert_notifications(db, notifications)
+        # The match requests, their counters and the notifications commit together
+        db.commit()
+        return rows
+    finally:
+        db.close()
+
+@job_queue.task("question.verified")
+async def handle_questions_verified(payload: Dict[str, Any]):
+    """Post-verification work for newly saved questions: offer each to its best-matched experts"""
+    # Matching and the writes use the sync session; keep them off the event loop
+    rows = await run_in_threadpool(_open_match_requests, payload)
+    await NotificationService().publish(rows)
+
+
+def schedule_stats_reconcile(db, delay_seconds: float = 0):
+    """
+    Enqueue the next reconciliation run. The idempotency key is the run's time
+    slot, so every app worker can call this and only one job per slot exists.
+    """
+    interval = settings.EXPERT_STATS_RECONCILE_SECONDS
+    run_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
+    slot = int(run_at.timestamp()) // interval
+    job_queue.enqueue(
+        db,
+        "expert_stats.reconcile",
+        {},
+        idempotency_key=f"expert_stats.reconcile:{slot}",
+        run_at=run_at
+    )
+    db.commit()
+
+def _reconcile_expert_stats():
+    db = SessionLocal()
+    try:
+        ExpertStatsService(db).reconcile()
+        schedule_stats_reconcile(db, delay_seconds=settings.EXPERT_STATS_RECONCILE_SECONDS)
+    finally:
+        db.close()
+
+@job_queue.task("expert_stats.reconcile")
+async def handle_expert_stats_reconcile(payload: Dict[str, Any]):
+    """Correct drift in the incremental dashboard counters, then schedule the next run"""
+    # Full-table aggregate on the sync session; keep it off the event loop
+    await run_in_threadpool(_reconcile_expert_stats)
+
+
+KEY_ROTATION_BATCH_SIZE = 500
+
+
+def schedule_key_rotation(db):
+    """
+    Enqueue re-wrapping of data keys under the active master key. Keyed on the
+    active key id, so this runs once per newly activated key.
+    """
+    key_id = get_encryption_service().active_key_id
+    job_queue.enqueue(
+        db,
+        "encryption.rotate_keys",
+        {"after": None},
+        idempotency_key=f"encryption.rotate_keys:{key_id}"
+    )
+    db.commit()
+
+def _rotate_key_batch(after: Optional[str]):
+    service = get_encryption_service()
+    db = SessionLocal()
+    try:
+        query = db.query(ExpertResponse.id, ExpertResponse.encryption_key_encrypted).filter(
+            ExpertResponse.encryption_key_encrypted.isnot(None)
+        )
+        if after:
+            query = query.filter(ExpertResponse.id > after)
+        batch = query.order_by(ExpertResponse.id).limit(KEY_ROTATION_BATCH_SIZE).all()
+        updates = [
+            {"id": row.id, "encryption_key_encrypted": service.rewrap_data_key(row.encryption_key_encrypted)}
+            for row in batch
+            if service.needs_rewrap(row.encryption_key_encrypted)
+        ]
+        if updates:
+            db.execute(update(ExpertResponse), updates)
+        if len(batch) == KEY_ROTATION_BATCH_SIZE:
+            last = str(batch[-1].id)
+            job_queue.enqueue(
+                db,
+                "encryption.rotate_keys",
+                {"after": last},
+                idempotency_key=f"encryption.rotate_keys:{service.active_key_id}:{last}"
+            )
+        # The batch and the job for the next one commit together
+        db.commit()
+    finally:
+        db.close()
+
+@job_queue.task("encryption.rotate_keys")
+async def handle_rotate_keys(payload: Dict[str, Any]):
+    """Re-wrap one batch of data keys, then enqueue the next batch"""
+    # Queries, unwrapping and the bulk update are all blocking; keep them off the event loop
+    await run_in_threadpool(_rotate_key_batch, payload.get("after"))
+
+
+def schedule_background_check_poll(db, delay_seconds: float = 0):
+    """Enqueue the next poll; slot-keyed like schedule_stats_reconcile so workers share one chain"""
+    interval = settings.BACKGROUND_CHECK_POLL_MIN_SECONDS
+    run_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
+    slot = int(run_at.timestamp()) // interval
+    job_queue.enqueue(
+        db,
+        "background_checks.poll",
+        {},
+        idempotency_key=f"background_checks.poll:{slot}",
+        run_at=run_at
+    )
+    db.commit()
+
+@job_queue.task("background_checks.poll")
+async def handle_background_check_poll(payload: Dict[str, Any]):
+    """Start checks for newly pending experts and poll every due check, a batch at a time, then schedule the next tick"""
+    db = SessionLocal()
+    try:
+        poller = BackgroundCheckPoller()
+        more = True
+        while more:
+            _, more = await poller.start_pending(db)
+        more = True
+        while more:
+            _, more = await poller.poll_due(db)
+        schedule_background_check_poll(db, delay_seconds=settings.BACKGROUND_CHECK_POLL_MIN_SECONDS)
+    finally:
+        db.close()
@@ -1,33 +1,59 @@
 import httpx
-from typing import Dict
-from app.core.config import Settings
+from typing import Dict, Optional
+from app.core.config import Settings, settings as app_settings
 
 class BackgroundCheckService:
-    def __init__(self, settings: Settings):
+    """
+    Client for the background check provider. One AsyncClient (connection pool,
+    keep-alive, TLS sessions) is shared by every call; close it with aclose().
+    """
+    def __init__(self, settings: Settings, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.api_key = settings.BACKGROUND_CHECK_API_KEY
         self.base_url = settings.BACKGROUND_CHECK_API_URL
-    
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=settings.BACKGROUND_CHECK_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.BACKGROUND_CHECK_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.BACKGROUND_CHECK_MAX_CONNECTIONS
+            ),
+            transport=transport
+        )
+
     async def initiate_check(self, expert_data: Dict) -> Dict:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/checks",
-                json=expert_data,
-                headers={"Authorization": f"Bearer {self.api_key}"}
-            )
-            
-            if response.status_code != 200:
-                raise Exception("Background check initiation failed")
-            
-            return response.json()
-    
+        response = await self.client.post("/checks", json=expert_data)
+
+        if response.status_code != 200:
+            raise Exception("Background check initiation failed")
+
+        return response.json()
+
     async def get_check_status(self, check_id: str) -> Dict:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/checks/{check_id}",
-                headers={"Authorization": f"Bearer {self.api_key}"}
-            )
-            
-            if response.status_code != 200:
-                raise Exception("Failed to get background check status")
-            
-            return response.json()
\ No newline at end of file
+        response = await self.client.get(f"/checks/{check_id}")
+
+        if response.status_code != 200:
+            raise Exception("Failed to get background check status")
+
+        return response.json()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_service: Optional[BackgroundCheckService] = None
+
+
+def get_background_check_service() -> BackgroundCheckService:
+    """Process-wide client so connections are reused across requests and polls"""
+    global _service
+    if _service is None:
+        _service = BackgroundCheckService(app_settings)
+    return _service
+
+
+async def close_background_check_service():
+    global _service
+    if _service is not None:
+        await _service.aclose()
+        _service = None
@@ -0,0 +1,42 @@
+# utils/background_check_stub.py
+"""
+Stand-in for the background check provider, for local runs and tests.
+Checks resolve after a few status polls; candidates whose full name ends
+in "Fail" come back failed. Use it in-process through
+httpx.ASGITransport(app=app), or run it standalone and point
+BACKGROUND_CHECK_API_URL at it:
+
+    uvicorn app.utils.background_check_stub:app --port 8081
+"""
+import uuid
+from typing import Dict
+
+from fastapi import FastAPI, HTTPException
+
+POLLS_UNTIL_COMPLETE = 3
+
+app = FastAPI(title="Background check stub")
+checks: Dict[str, Dict] = {}
+
+
+@app.post("/checks")
+async def create_check(expert_data: Dict):
+    check_id = str(uuid.uuid4())
+    checks[check_id] = {
+        "id": check_id,
+        "status": "pending",
+        "polls": 0,
+        "outcome": "failed" if (expert_data.get("full_name") or "").endswith("Fail") else "passed",
+    }
+    return {"id": check_id, "status": "pending"}
+
+
+@app.get("/checks/{check_id}")
+async def get_check(check_id: str):
+    check = checks.get(check_id)
+    if check is None:
+        raise HTTPException(status_code=404, detail="Check not found")
+    check["polls"] += 1
+    if check["polls"] >= POLLS_UNTIL_COMPLETE:
+        check["status"] = check["outcome"]
+    return {"id": check_id, "status": check["status"]}
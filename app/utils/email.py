@@ -1,22 +1,231 @@
-from typing import List, Optional
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from app.core.config import Settings
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import threading
+from email.message import EmailMessage
+from email.utils import formataddr
+from functools import lru_cache
 from pathlib import Path
+from string import Template
+from typing import List, Optional, Tuple
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from app.core.config import Settings
+from app.core.metrics import metrics
 
-class EmailManager:
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FOLDER = Path(__file__).parent / 'email_templates'
+
+
+
+class OutgoingEmail(BaseModel):
+    email_to: str
+    subject: str
+    body: str = ""
+    template_name: Optional[str] = None
+    template_body: Optional[dict] = None
+
+
+class EmailBatchResult(BaseModel):
+    sent: int = 0
+    failed: List[str] = []
+
+
+@lru_cache(maxsize=128)
+def _load_template(path: Path, mtime: float) -> Template:
+    """Parsed templates; mtime is part of the key so edits are picked up"""
+    return Template(path.read_text())
+
+
+def render_template(template_name: str, context: dict) -> str:
+    path = (TEMPLATE_FOLDER / template_name).resolve()
+    if TEMPLATE_FOLDER.resolve() not in path.parents:
+        raise ValueError(f"Invalid template: {template_name}")
+    return _load_template(path, path.stat().st_mtime).safe_substitute(context)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Worth retrying: 4xx replies and connection trouble. 5xx replies are final."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    # SMTPException subclasses OSError, so this only sees socket-level errors
+    return isinstance(error, OSError)
+
+
+class SMTPConnectionPool:
+    """
+    Persistent SMTP connections shared across sends. Blocking; used from the
+    threadpool. Idle connections are health-checked with NOOP before reuse and
+    replaced after max_messages so server-side per-connection limits are respected.
+    """
     def __init__(self, settings: Settings):
-        self.conf = ConnectionConfig(
-            MAIL_USERNAME=settings.SMTP_USER,
-            MAIL_PASSWORD=settings.SMTP_PASSWORD,
-            MAIL_FROM=settings.SMTP_USER,
-            MAIL_PORT=settings.SMTP_PORT,
-            MAIL_SERVER=settings.SMTP_HOST,
-            MAIL_TLS=settings.SMTP_TLS,
-            MAIL_SSL=False,
-            TEMPLATE_FOLDER=Path(__file__).parent / 'email_templates'
+        self.settings = settings
+        self.size = settings.EMAIL_POOL_SIZE
+        self.max_messages = settings.EMAIL_CONNECTION_MAX_MESSAGES
+        self._idle: "queue.LifoQueue[Tuple[smtplib.SMTP, int]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(
+            self.settings.SMTP_HOST,
+            self.settings.SMTP_PORT or 0,
+            timeout=self.settings.SMTP_TIMEOUT_SECONDS
         )
-        self.fastmail = FastMail(self.conf)
-    
+        if self.settings.SMTP_TLS:
+            conn.starttls()
+        if self.settings.SMTP_USER and self.settings.SMTP_PASSWORD:
+            conn.login(self.settings.SMTP_USER, self.settings.SMTP_PASSWORD)
+        metrics.incr("smtp_connections_opened")
+        return conn
+
+    def acquire(self) -> Tuple[smtplib.SMTP, int]:
+        """(connection, messages already sent on it); blocks while all are in use"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect(), 0
+                try:
+                    if conn.noop()[0] == 250:
+                        return conn, used
+                except smtplib.SMTPException:
+                    pass
+                self._close(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: smtplib.SMTP, used: int, broken: bool = False):
+        if broken or used >= self.max_messages:
+            self._close(conn)
+        else:
+            self._idle.put((conn, used))
+        self._slots.release()
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+
+class EmailManager:
+    """
+    Outbound email over pooled SMTP connections. Large sends are split into
+    batches of EMAIL_BATCH_SIZE, each delivered on one connection, with up to
+    EMAIL_POOL_SIZE batches in flight; transient failures are retried with
+    jittered exponential backoff.
+    """
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.sender = formataddr((
+            settings.EMAILS_FROM_NAME or "",
+            settings.EMAILS_FROM_EMAIL or settings.SMTP_USER or ""
+        ))
+        self.pool = SMTPConnectionPool(settings)
+
+    def build_message(self, email: OutgoingEmail) -> EmailMessage:
+        body = email.body
+        if email.template_name:
+            body = render_template(email.template_name, email.template_body or {})
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = email.email_to
+        message['Subject'] = email.subject
+        message.set_content(body, subtype='html')
+        return message
+
+    def _send_batch(self, messages: List[EmailMessage]) -> List[Tuple[EmailMessage, Exception]]:
+        """Send on one pooled connection; returns the messages that failed"""
+        conn, used = self.pool.acquire()
+        failures = []
+        broken = False
+        try:
+            for index, message in enumerate(messages):
+                try:
+                    conn.send_message(message)
+                    used += 1
+                except smtplib.SMTPServerDisconnected as e:
+                    # The connection is gone; everything not yet sent fails transiently
+                    broken = True
+                    failures.extend((m, e) for m in messages[index:])
+                    break
+                except smtplib.SMTPException as e:
+                    # A reply error (4xx/5xx) only fails this message; the connection is fine
+                    failures.append((message, e))
+                    try:
+                        conn.rset()
+                    except (smtplib.SMTPException, OSError):
+                        broken = True
+                        failures.extend((m, e) for m in messages[index + 1:])
+                        break
+                except OSError as e:
+                    # Socket-level failure (SMTPException is an OSError, so it is caught first)
+                    broken = True
+                    failures.extend((m, e) for m in messages[index:])
+                    break
+        finally:
+            self.pool.release(conn, used, broken=broken)
+        return failures
+
+    async def send_many(self, emails: List[OutgoingEmail]) -> EmailBatchResult:
+        pending = [self.build_message(email) for email in emails]
+        result = EmailBatchResult()
+        batch_size = self.settings.EMAIL_BATCH_SIZE
+        # Bound on the async side so waiting batches do not park threadpool threads
+        slots = asyncio.Semaphore(self.pool.size)
+
+        async def send(batch: List[EmailMessage]):
+            async with slots:
+                return await run_in_threadpool(self._send_batch, batch)
+
+        for attempt in range(self.settings.EMAIL_MAX_RETRIES + 1):
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            outcomes = await asyncio.gather(
+                *(send(batch) for batch in batches),
+                return_exceptions=True
+            )
+            retry = []
+            for batch, outcome in zip(batches, outcomes):
+                # A batch that raised never got a connection; the whole batch is retryable
+                failures = [(m, outcome) for m in batch] if isinstance(outcome, Exception) else outcome
+                result.sent += len(batch) - len(failures)
+                for message, error in failures:
+                    if _is_transient(error) and attempt < self.settings.EMAIL_MAX_RETRIES:
+                        retry.append(message)
+                    else:
+                        logger.error(f"Failed to send email to {message['To']}: {str(error)}")
+                        result.failed.append(message['To'])
+            if not retry:
+                break
+            pending = retry
+            delay = self.settings.EMAIL_BACKOFF_SECONDS * (2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+        metrics.incr("emails_sent", result.sent)
+        metrics.incr("emails_failed", len(result.failed))
+        return result
+
     async def send_email(
         self,
         email_to: str,
@@ -25,11 +234,15 @@ class EmailManager:
         template_name: Optional[str] = None,
         template_body: Optional[dict] = None
     ):
-        message = MessageSchema(
+        result = await self.send_many([OutgoingEmail(
+            email_to=email_to,
             subject=subject,
-            recipients=[email_to],
             body=body,
-            subtype='html'
-        )
-        
-        await self.fastmail.send_message(message, template_name=template_name)
\ No newline at end of file
+            template_name=template_name,
+            template_body=template_body
+        )])
+        if result.failed:
+            raise Exception(f"Failed to send email to {email_to}")
+
+    async def close(self):
+        await run_in_threadpool(self.pool.close_all)
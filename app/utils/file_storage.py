@@ -1,48 +1,457 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple, Union
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Optional, BinaryIO
-from app.core.config import Settings
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import Settings, settings as app_settings
+
+READ_CHUNK_SIZE = 1024 * 1024
+# SigV4 presigned URLs are valid for at most seven days
+MAX_PRESIGN_SECONDS = 7 * 24 * 3600
+
+FileSource = Union[UploadFile, BinaryIO]
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the size it was granted"""
+
+
+async def read_chunk(file_obj: FileSource, size: int) -> bytes:
+    """Read up to size bytes from an UploadFile or a plain (blocking) file object"""
+    if isinstance(file_obj, UploadFile):
+        return await file_obj.read(size)
+    return await run_in_threadpool(file_obj.read, size)
+
+
+async def read_exactly(file_obj: FileSource, size: int) -> bytes:
+    """Read size bytes unless the source ends first"""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = await read_chunk(file_obj, min(size - len(buffer), READ_CHUNK_SIZE))
+        if not chunk:
+            break
+        buffer += chunk
+    return bytes(buffer)
+
+
+class PresignedUrlCache:
+    """
+    Presigned GET URLs keyed by (object, expires_in, expiry bucket).
+    Every URL signed inside a bucket is made valid until the bucket ends plus
+    expires_in, so a cached URL always has at least expires_in left when handed
+    out, and repeat requests in the window cost a dict lookup.
+    """
+    def __init__(self, bucket_seconds: int, max_entries: int):
+        self.bucket_seconds = max(bucket_seconds, 1)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def slot(self, expires_in: int, now: Optional[float] = None) -> Tuple[int, int]:
+        """(bucket index, ExpiresIn to sign with)"""
+        now = time.time() if now is None else now
+        bucket = int(now // self.bucket_seconds)
+        bucket_end = (bucket + 1) * self.bucket_seconds
+        return bucket, min(int(bucket_end - now) + expires_in, MAX_PRESIGN_SECONDS)
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[str]:
+        with self._lock:
+            url = self._entries.get(key)
+            if url is not None:
+                self._entries.move_to_end(key)
+            return url
+
+    def put(self, key: Tuple[str, int, int], url: str):
+        with self._lock:
+            self._entries[key] = url
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class FileStorage(ABC):
+    """Object storage keyed by file name"""
+    @abstractmethod
+    async def upload_file(
+        self,
+        file_obj: FileSource,
+        file_name: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """Stream file_obj to storage; returns the object's location"""
+
+    @abstractmethod
+    def iter_file(self, file_name: str, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        ...
+
+    @abstractmethod
+    async def delete_file(self, file_name: str):
+        ...
+
+    @abstractmethod
+    async def get_download_url(self, file_name: str, expires_in: int = 3600) -> str:
+        ...
+
+    @abstractmethod
+    async def create_upload(
+        self,
+        file_name: str,
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        expires_in: int = 900
+    ) -> Dict[str, Any]:
+        """
+        Direct-to-storage upload for clients: {"method", "url", "fields"}.
+        POST uploads send fields plus the file as multipart form data; PUT
+        uploads send the raw body to url.
+        """
 
-class S3Storage:
+
+class S3Storage(FileStorage):
+    """
+    S3 backend. One boto3 client (thread-safe, pooled connections) is shared by
+    every call; its blocking calls run in the threadpool. Uploads larger than a
+    part are sent as a multipart upload with up to max_concurrency parts in
+    flight, so memory stays at roughly part_size * max_concurrency.
+    """
     def __init__(self, settings: Settings):
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
+            region_name=settings.AWS_REGION,
+            config=Config(
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                retries={"mode": "adaptive", "max_attempts": 5}
+            )
         )
         self.bucket = settings.S3_BUCKET
-    
+        self.part_size = max(settings.S3_MULTIPART_PART_SIZE, 5 * 1024 * 1024)
+        self.max_concurrency = settings.S3_MAX_CONCURRENCY
+        self.url_cache = PresignedUrlCache(
+            settings.PRESIGNED_URL_BUCKET_SECONDS,
+            settings.PRESIGNED_URL_CACHE_SIZE
+        )
+
+    def _location(self, file_name: str) -> str:
+        return f"https://{self.bucket}.s3.amazonaws.com/{file_name}"
+
     async def upload_file(
         self,
-        file_obj: BinaryIO,
+        file_obj: FileSource,
         file_name: str,
         content_type: Optional[str] = None
     ) -> str:
+        extra_args = {}
+        if content_type:
+            extra_args['ContentType'] = content_type
+
         try:
-            extra_args = {}
-            if content_type:
-                extra_args['ContentType'] = content_type
-            
-            await self.s3_client.upload_fileobj(
-                file_obj,
-                self.bucket,
-                file_name,
-                ExtraArgs=extra_args
-            )
-            
-            return f"https://{self.bucket}.s3.amazonaws.com/{file_name}"
-        
+            first = await read_exactly(file_obj, self.part_size)
+            following = await read_exactly(file_obj, self.part_size) if len(first) == self.part_size else b""
+            if not following:
+                await run_in_threadpool(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket,
+                    Key=file_name,
+                    Body=first,
+                    **extra_args
+                )
+            else:
+                await self._upload_multipart(file_obj, file_name, [first, following], extra_args)
+            return self._location(file_name)
+
         except ClientError as e:
             raise Exception(f"Failed to upload file: {str(e)}")
-    
+
+    async def _upload_multipart(self, file_obj: FileSource, file_name: str, head: list, extra_args: dict):
+        upload = await run_in_threadpool(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.bucket,
+            Key=file_name,
+            **extra_args
+        )
+        upload_id = upload['UploadId']
+        slots = asyncio.Semaphore(self.max_concurrency)
+        parts = {}
+
+        async def send(part_number: int, body: bytes):
+            try:
+                response = await run_in_threadpool(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket,
+                    Key=file_name,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body
+                )
+                parts[part_number] = response['ETag']
+            finally:
+                slots.release()
+
+        tasks = []
+        try:
+            part_number = 0
+            pending = list(head)
+            while True:
+                body = pending.pop(0) if pending else await read_exactly(file_obj, self.part_size)
+                if not body:
+                    break
+                # Wait for a free slot before reading further, bounding buffered parts
+                await slots.acquire()
+                failed = next((t for t in tasks if t.done() and t.exception()), None)
+                if failed is not None:
+                    slots.release()
+                    raise failed.exception()
+                part_number += 1
+                tasks.append(asyncio.create_task(send(part_number, body)))
+            await asyncio.gather(*tasks)
+
+            await run_in_threadpool(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket,
+                Key=file_name,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'PartNumber': n, 'ETag': parts[n]} for n in sorted(parts)
+                ]}
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await run_in_threadpool(
+                self.s3_client.abort_multipart_upload,
+                Bucket=self.bucket,
+                Key=file_name,
+                UploadId=upload_id
+            )
+            raise
+
+    async def iter_file(self, file_name: str, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        try:
+            response = await run_in_threadpool(self.s3_client.get_object, Bucket=self.bucket, Key=file_name)
+        except ClientError as e:
+            raise Exception(f"Failed to download file: {str(e)}")
+        body = response['Body']
+        try:
+            while True:
+                chunk = await run_in_threadpool(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete_file(self, file_name: str):
+        try:
+            await run_in_threadpool(self.s3_client.delete_object, Bucket=self.bucket, Key=file_name)
+        except ClientError as e:
+            raise Exception(f"Failed to delete file: {str(e)}")
+
     async def get_download_url(self, file_name: str, expires_in: int = 3600) -> str:
+        bucket, sign_seconds = self.url_cache.slot(expires_in)
+        cache_key = (file_name, expires_in, bucket)
+        url = self.url_cache.get(cache_key)
+        if url is not None:
+            return url
         try:
+            # Signing is local (no network call), so it does not need the threadpool
             url = self.s3_client.generate_presigned_url(
                 'get_object',
                 Params={'Bucket': self.bucket, 'Key': file_name},
+                ExpiresIn=sign_seconds
+            )
+        except ClientError as e:
+            raise Exception(f"Failed to generate download URL: {str(e)}")
+        self.url_cache.put(cache_key, url)
+        return url
+
+    async def create_upload(
+        self,
+        file_name: str,
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        expires_in: int = 900
+    ) -> Dict[str, Any]:
+        try:
+            if max_bytes is None:
+                params = {'Bucket': self.bucket, 'Key': file_name}
+                if content_type:
+                    params['ContentType'] = content_type
+                url = self.s3_client.generate_presigned_url(
+                    'put_object',
+                    Params=params,
+                    ExpiresIn=expires_in
+                )
+                headers = {'Content-Type': content_type} if content_type else {}
+                return {"method": "PUT", "url": url, "fields": headers}
+
+            # POST policies can enforce the size limit; presigned PUTs cannot
+            fields, conditions = {}, [["content-length-range", 1, max_bytes]]
+            if content_type:
+                fields['Content-Type'] = content_type
+                conditions.append({'Content-Type': content_type})
+            post = self.s3_client.generate_presigned_post(
+                self.bucket,
+                file_name,
+                Fields=fields,
+                Conditions=conditions,
                 ExpiresIn=expires_in
             )
-            return url
+            return {"method": "POST", "url": post['url'], "fields": post['fields']}
         except ClientError as e:
-            raise Exception(f"Failed to generate download URL: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to generate upload URL: {str(e)}")
+
+
+class LocalStorage(FileStorage):
+    """
+    Filesystem backend with the same interface, for development and offline tests.
+    URLs under LOCAL_STORAGE_URL are HMAC-signed with SECRET_KEY and served by
+    app.api.v1.files, which checks the signature, expiry and upload size.
+    """
+    def __init__(self, settings: Settings):
+        self.root = Path(settings.LOCAL_STORAGE_PATH).resolve()
+        self.base_url = settings.LOCAL_STORAGE_URL.rstrip("/")
+        self.secret = settings.SECRET_KEY.encode()
+
+    def _path(self, file_name: str) -> Path:
+        path = (self.root / file_name).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid file name: {file_name}")
+        return path
+
+    def _signature(self, method: str, file_name: str, expires: int, max_bytes: Optional[int]) -> str:
+        message = f"{method}\n{file_name}\n{expires}\n{max_bytes or ''}".encode()
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def _signed_url(self, method: str, file_name: str, expires_in: int, max_bytes: Optional[int] = None) -> str:
+        self._path(file_name)
+        expires = int(time.time()) + expires_in
+        query = f"expires={expires}"
+        if max_bytes:
+            query += f"&max_bytes={max_bytes}"
+        query += f"&signature={self._signature(method, file_name, expires, max_bytes)}"
+        return f"{self.base_url}/{file_name}?{query}"
+
+    def verify(
+        self,
+        method: str,
+        file_name: str,
+        expires: int,
+        signature: str,
+        max_bytes: Optional[int] = None
+    ) -> bool:
+        """Whether a signed URL's parameters are authentic and unexpired"""
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(method, file_name, expires, max_bytes))
+
+    async def _write(self, file_name: str, chunks: AsyncIterator[bytes]):
+        path = self._path(file_name)
+        await run_in_threadpool(path.parent.mkdir, parents=True, exist_ok=True)
+        # Write to a temporary name so readers never see a partial file
+        partial = path.with_name(path.name + ".partial")
+        handle = await run_in_threadpool(open, partial, "wb")
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(handle.write, chunk)
+        except BaseException:
+            handle.close()
+            await run_in_threadpool(partial.unlink, missing_ok=True)
+            raise
+        handle.close()
+        await run_in_threadpool(os.replace, partial, path)
+
+    async def upload_file(
+        self,
+        file_obj: FileSource,
+        file_name: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        async def chunks():
+            while True:
+                chunk = await read_chunk(file_obj, READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+        await self._write(file_name, chunks())
+        return f"{self.base_url}/{file_name}"
+
+    async def receive_upload(
+        self,
+        file_name: str,
+        chunks: AsyncIterator[bytes],
+        max_bytes: Optional[int] = None
+    ):
+        """Store a client's direct upload; raises UploadTooLargeError past max_bytes"""
+        async def limited():
+            received = 0
+            async for chunk in chunks:
+                received += len(chunk)
+                if max_bytes and received > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                yield chunk
+
+        await self._write(file_name, limited())
+
+    async def exists(self, file_name: str) -> bool:
+        return await run_in_threadpool(self._path(file_name).is_file)
+
+    async def iter_file(self, file_name: str, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        handle = await run_in_threadpool(open, self._path(file_name), "rb")
+        try:
+            while True:
+                chunk = await run_in_threadpool(handle.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            handle.close()
+
+    async def delete_file(self, file_name: str):
+        await run_in_threadpool(self._path(file_name).unlink, missing_ok=True)
+
+    async def get_download_url(self, file_name: str, expires_in: int = 3600) -> str:
+        return self._signed_url("GET", file_name, expires_in)
+
+    async def create_upload(
+        self,
+        file_name: str,
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        expires_in: int = 900
+    ) -> Dict[str, Any]:
+        headers = {'Content-Type': content_type} if content_type else {}
+        return {
+            "method": "PUT",
+            "url": self._signed_url("PUT", file_name, expires_in, max_bytes),
+            "fields": headers
+        }
+
+
+_storage: Optional[FileStorage] = None
+
+
+def get_storage() -> FileStorage:
+    """Shared storage backend chosen by STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        if app_settings.STORAGE_BACKEND == "local":
+            _storage = LocalStorage(app_settings)
+        else:
+            _storage = S3Storage(app_settings)
+    return _storage
@@ -0,0 +1,94 @@
+# utils/smtp_sink.py
+"""
+In-process SMTP server that accepts everything and keeps the messages in
+memory, for exercising EmailManager without a real mail server. Speaks just
+enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT).
+
+    python -m app.utils.smtp_sink --port 1025
+"""
+import argparse
+import asyncio
+from email import message_from_bytes
+from email.message import Message
+from typing import List, Optional
+
+
+class SMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fail_first: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: List[Message] = []
+        self.connections = 0
+        # Reply 451 to the first fail_first DATA commands, to exercise retries
+        self.fail_first = fail_first
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 smtp-sink ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+                if command == "EHLO":
+                    await reply("250-smtp-sink")
+                    await reply("250 8BITMIME")
+                elif command in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = bytearray()
+                    while True:
+                        chunk = await reader.readline()
+                        if not chunk or chunk == b".\r\n":
+                            break
+                        data += chunk[1:] if chunk.startswith(b"..") else chunk
+                    if self.fail_first > 0:
+                        self.fail_first -= 1
+                        await reply("451 Try again later")
+                    else:
+                        self.messages.append(message_from_bytes(bytes(data)))
+                        await reply("250 Queued")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+
+async def _serve(host: str, port: int):
+    sink = SMTPSink(host, port)
+    await sink.start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await sink.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port))
@@ -21,6 +21,11 @@ class DataValidator:
         
         return True
     
+    @staticmethod
+    def normalize_expertise(expertise: List[str]) -> List[str]:
+        """Lowercase, trim and de-duplicate tags so array overlap matches regardless of casing"""
+        return list(dict.fromkeys(exp.strip().lower() for exp in expertise if exp and exp.strip()))
+    
     @staticmethod
     def validate_budget_range(min_budget: float, max_budget: float) -> bool:
         if min_budget < 0 or max_budget < 0:
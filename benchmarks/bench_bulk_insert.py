@@ -0,0 +1,92 @@
+# benchmarks/bench_bulk_insert.py
+"""
+Compare QuestionService.bulk_create_questions against the previous
+bulk_save_objects implementation, after checking that both the INSERT and
+the COPY paths store awkward content (empty, quotes, commas, newlines)
+unchanged. Needs the Postgres database from .env; rows and the throwaway
+client user are deleted afterwards.
+
+    python -m benchmarks.bench_bulk_insert
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.models import User, Question
+from app.services.question import COPY_THRESHOLD, QuestionService
+
+SIZES = [10, 1_000, 100_000]
+AWKWARD_CONTENT = ["", " ", '"quoted"', "a,b", "line\nbreak", "NULL", "\\N"]
+
+
+def legacy_bulk_create(db, client_id, final_content):
+    """The implementation bulk_create_questions replaced"""
+    questions = [
+        Question(
+            client_id=client_id,
+            content=q,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        for q in final_content
+    ]
+    db.bulk_save_objects(questions)
+    db.commit()
+    return final_content
+
+
+async def check_round_trip(db, client_id):
+    """Both insert paths must store every text exactly, empty content included"""
+    for size in (len(AWKWARD_CONTENT), COPY_THRESHOLD):
+        contents = [AWKWARD_CONTENT[i % len(AWKWARD_CONTENT)] for i in range(size)]
+        created = await QuestionService(db).bulk_create_questions(client_id, contents)
+        db.commit()
+        stored = dict(db.query(Question.id, Question.content).filter(Question.client_id == client_id).all())
+        assert len(stored) == size, f"{size} rows: stored {len(stored)}"
+        for q in created:
+            assert stored[q.id] == q.content, f"{size} rows: {q.content!r} stored as {stored[q.id]!r}"
+        db.query(Question).filter(Question.client_id == client_id).delete()
+        db.commit()
+    print(f"round trip ok for {len(AWKWARD_CONTENT)} and {COPY_THRESHOLD} rows")
+
+
+async def run():
+    db = SessionLocal()
+    user = User(
+        email=f"bench-{uuid.uuid4().hex}@example.com",
+        hashed_password="benchmark",
+        full_name="Benchmark",
+        role="client"
+    )
+    db.add(user)
+    db.commit()
+
+    try:
+        await check_round_trip(db, user.id)
+        print(f"{'rows':>8} {'legacy (s)':>12} {'new (s)':>12} {'speedup':>8}")
+        for size in SIZES:
+            contents = [f"Benchmark question {i} about market sizing?" for i in range(size)]
+
+            start = time.perf_counter()
+            legacy_bulk_create(db, user.id, contents)
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            await QuestionService(db).bulk_create_questions(user.id, contents)
+            db.commit()
+            new = time.perf_counter() - start
+
+            print(f"{size:>8} {legacy:>12.4f} {new:>12.4f} {legacy / new:>7.1f}x")
+            db.query(Question).filter(Question.client_id == user.id).delete()
+            db.commit()
+    finally:
+        db.query(Question).filter(Question.client_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
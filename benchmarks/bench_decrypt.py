@@ -0,0 +1,69 @@
+# benchmarks/bench_decrypt.py
+"""
+Decrypt 10k expert-response-sized records three ways: one decrypt_content call
+per record with no key cache (the old per-row path), decrypt_many with a cold
+cache, and decrypt_many again with the data keys cached. Runs in memory with
+throwaway keys; no database needed.
+
+    python -m benchmarks.bench_decrypt
+"""
+import os
+import time
+from types import SimpleNamespace
+
+from cryptography.fernet import Fernet
+
+from app.core.executor import crypto_executor
+from app.services.encryption import DataKeyCache, EncryptionService
+
+RECORDS = 10_000
+RESPONSE_BYTES = 4_000
+
+
+def make_settings(**overrides):
+    values = dict(
+        ENCRYPTION_MASTER_KEY="",
+        ENCRYPTION_MASTER_KEYS=f"bench:{Fernet.generate_key().decode()}",
+        ENCRYPTION_CHUNK_SIZE=64 * 1024,
+        ENCRYPTION_KEY_CACHE_SIZE=RECORDS,
+        ENCRYPTION_KEY_CACHE_TTL_SECONDS=300,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run():
+    settings = make_settings()
+    service = EncryptionService(settings)
+    plaintext = "x" * RESPONSE_BYTES
+    records = [service.encrypt_content(plaintext) for _ in range(RECORDS)]
+
+    serial = EncryptionService(settings, key_cache=DataKeyCache(0, 0))
+    _, baseline = timed(lambda: [serial.decrypt_content(c, k) for c, k in records])
+
+    service.key_cache.clear()
+    cold_result, cold = timed(lambda: service.decrypt_many(records))
+    warm_result, warm = timed(lambda: service.decrypt_many(records))
+    assert cold_result == warm_result == [plaintext] * RECORDS
+
+    print(
+        f"{RECORDS} records of {RESPONSE_BYTES} bytes, "
+        f"{crypto_executor.max_workers} workers on {os.cpu_count()} CPUs"
+    )
+    print(f"{'path':<28} {'seconds':>8} {'speedup':>8}")
+    for name, seconds in [
+        ("serial, no key cache", baseline),
+        ("decrypt_many, cold cache", cold),
+        ("decrypt_many, warm cache", warm),
+    ]:
+        print(f"{name:<28} {seconds:>8.3f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,93 @@
+# benchmarks/eval_scoring.py
+"""
+Offline evaluation of the expert scoring engine on synthetic experts.
+
+Reports NDCG@10 against a planted relevance signal for the weighted engine
+and an expertise-only, unweighted baseline (the old behaviour), plus scoring
+throughput for growing expert counts.
+
+    python -m benchmarks.eval_scoring
+"""
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.scoring import ExpertFeatures, ScoringEngine
+
+TAGS = [f"tag{i}" for i in range(300)]
+K = 10
+
+
+def make_experts(n, rng):
+    experts = []
+    for _ in range(n):
+        tags = list(rng.choice(TAGS, size=rng.integers(2, 8), replace=False))
+        experts.append(SimpleNamespace(
+            expertise=tags,
+            expertise_weights={t: float(rng.uniform(0.2, 3.0)) for t in tags},
+            rating=float(rng.uniform(2.5, 5.0)),
+            total_questions=int(rng.integers(0, 500)),
+            hourly_rate=float(rng.uniform(50, 400)),
+        ))
+    return experts
+
+
+def relevance(expert, query_tags, budget):
+    """Planted ground truth: weighted tag overlap, discounted by poor rating, load and price"""
+    overlap = sum(expert.expertise_weights.get(t, 0.0) for t in query_tags)
+    fit = 1.0 if expert.hourly_rate <= budget else budget / expert.hourly_rate
+    return overlap * (expert.rating / 5.0) * fit / (1.0 + np.log1p(expert.total_questions) / 5.0)
+
+
+def ndcg_at_k(ranked, gains, k=K):
+    dcg = sum(gains[i] / np.log2(pos + 2) for pos, i in enumerate(ranked[:k]))
+    ideal = sorted(gains, reverse=True)[:k]
+    idcg = sum(g / np.log2(pos + 2) for pos, g in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def evaluate_quality(rng, n_experts=2000, n_queries=200):
+    experts = make_experts(n_experts, rng)
+    features = ExpertFeatures(experts)
+    unweighted = ExpertFeatures([
+        SimpleNamespace(**{**vars(e), "expertise_weights": {}}) for e in experts
+    ])
+    engines = {
+        "weighted": (ScoringEngine(), features),
+        "baseline": (ScoringEngine({"expertise": 1.0}), unweighted),
+    }
+    results = {name: [] for name in engines}
+    for _ in range(n_queries):
+        query_tags = list(rng.choice(TAGS, size=3, replace=False))
+        budget = float(rng.uniform(100, 300))
+        gains = [relevance(e, query_tags, budget) for e in experts]
+        for name, (engine, feats) in engines.items():
+            ranked = [i for i, _, _ in engine.rank(feats, feats.query_vector(query_tags), budget=budget, top_k=K)]
+            results[name].append(ndcg_at_k(ranked, gains))
+    for name, values in results.items():
+        print(f"NDCG@{K} {name:>9}: {np.mean(values):.3f}")
+
+
+def evaluate_throughput(rng):
+    engine = ScoringEngine()
+    for n in [1_000, 10_000, 100_000]:
+        experts = make_experts(n, rng)
+        start = time.perf_counter()
+        features = ExpertFeatures(experts)
+        build = time.perf_counter() - start
+
+        query = features.query_vector(["tag1", "tag2", "tag3"])
+        runs = 50
+        start = time.perf_counter()
+        for _ in range(runs):
+            engine.rank(features, query, budget=200.0, top_k=K)
+        per_query = (time.perf_counter() - start) / runs
+        print(f"{n:>7} experts: build {build * 1000:8.1f} ms, rank {per_query * 1000:7.2f} ms/query, "
+              f"{n / per_query / 1e6:6.2f} M experts/s")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    evaluate_quality(rng)
+    evaluate_throughput(rng)
@@ -13,6 +13,19 @@ from app.api.v1.auth import router as auth_router
 from app.api.v1.question import router as question_router
 from app.api.v1.session import router as session_router
 from app.api.v1.expert import router as expert_router
+from app.api.v1.notification import router as notification_router
+from app.api.v1.files import router as files_router
+from app.services.job_queue import job_queue
+from app.services.dedup import question_dedup
+from app.services.notification import notification_hub
+from app.core.executor import crypto_executor
+from app.services.oauth import oauth_registry
+from app.utils.back_ground_check import close_background_check_service
+from app.services.ai_service import close_ai_service
+from app.db.session import SessionLocal
+from starlette.concurrency import run_in_threadpool
+import asyncio
+from app.services import tasks  # Registers background job handlers
 
 import logging
 
@@ -50,6 +63,59 @@ if settings.REDIS_HOST:
     )
 '''
 
+@app.on_event("startup")
+async def start_background_workers():
+    await job_queue.start()
+    await notification_hub.start()
+    await oauth_registry.start()
+    # Warm the duplicate-question index and schedule jobs without delaying startup;
+    # the tasks are kept so they are not garbage-collected and can be cancelled
+    app.state.startup_tasks = [
+        asyncio.create_task(run_in_threadpool(rebuild_dedup_index), name="rebuild_dedup_index"),
+        asyncio.create_task(run_in_threadpool(schedule_periodic_jobs), name="schedule_periodic_jobs")
+    ]
+    for task in app.state.startup_tasks:
+        task.add_done_callback(log_task_failure)
+
+def log_task_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logging.getLogger(__name__).error(f"Startup task {task.get_name()} failed: {str(task.exception())}")
+
+def schedule_periodic_jobs():
+    db = SessionLocal()
+    try:
+        tasks.schedule_stats_reconcile(db)
+        if settings.ENCRYPTION_MASTER_KEY or settings.ENCRYPTION_MASTER_KEYS:
+            tasks.schedule_key_rotation(db)
+        if settings.BACKGROUND_CHECK_API_URL:
+            tasks.schedule_background_check_poll(db)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Failed to schedule periodic jobs: {str(e)}")
+    finally:
+        db.close()
+
+def rebuild_dedup_index():
+    db = SessionLocal()
+    try:
+        question_dedup.rebuild(db)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Failed to rebuild duplicate-question index: {str(e)}")
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    startup_tasks = getattr(app.state, "startup_tasks", [])
+    for task in startup_tasks:
+        task.cancel()
+    await asyncio.gather(*startup_tasks, return_exceptions=True)
+    await job_queue.stop()
+    await notification_hub.stop()
+    await oauth_registry.stop()
+    crypto_executor.shutdown()
+    await close_background_check_service()
+    await close_ai_service()
+
 # Auth middleware
 app.middleware("http")(auth_middleware)
 
@@ -78,3 +144,16 @@ app.include_router(
     tags=["question"]
 )
 
+app.include_router(
+    notification_router,
+    prefix=settings.API_V1_STR + "/notifications",
+    tags=["notifications"]
+)
+
+if settings.STORAGE_BACKEND == "local":
+    # Signed attachment URLs handed out by LocalStorage point here
+    app.include_router(
+        files_router,
+        prefix=settings.LOCAL_STORAGE_URL.rstrip("/"),
+        tags=["files"]
+    )
@@ -0,0 +1,10 @@
+-- Full-text and fuzzy search over questions.content
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE questions ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_questions_search_vector
+    ON questions USING gin (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_questions_content_trgm
+    ON questions USING gin (content gin_trgm_ops);
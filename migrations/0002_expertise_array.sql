@@ -0,0 +1,18 @@
+-- Store expert_profiles.expertise as a lowercased varchar[] with a GIN index
+BEGIN;
+
+ALTER TABLE expert_profiles ADD COLUMN expertise_tags varchar[];
+
+UPDATE expert_profiles
+SET expertise_tags = ARRAY(
+    SELECT DISTINCT lower(trim(tag)) FROM json_array_elements_text(expertise) AS tag
+)
+WHERE expertise IS NOT NULL;
+
+ALTER TABLE expert_profiles DROP COLUMN expertise;
+ALTER TABLE expert_profiles RENAME COLUMN expertise_tags TO expertise;
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_expert_profiles_expertise
+    ON expert_profiles USING gin (expertise);
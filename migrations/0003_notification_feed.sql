@@ -0,0 +1,20 @@
+-- Keyset-paginated notification feed and per-user unread counters
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS notification_counters (
+    user_id uuid PRIMARY KEY REFERENCES users (id),
+    unread integer NOT NULL DEFAULT 0,
+    updated_at timestamp
+);
+
+INSERT INTO notification_counters (user_id, unread, updated_at)
+SELECT user_id, count(*), now()
+FROM notifications
+WHERE NOT is_read AND user_id IS NOT NULL
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET unread = excluded.unread, updated_at = excluded.updated_at;
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_user_read_created
+    ON notifications (user_id, is_read, created_at);
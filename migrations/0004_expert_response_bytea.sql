@@ -0,0 +1,9 @@
+-- Store encrypted expert responses as raw bytes. Existing base64(Fernet) text is
+-- kept byte-for-byte, which EncryptionService still reads as the legacy format.
+BEGIN;
+
+ALTER TABLE expert_responses
+    ALTER COLUMN main_response_encrypted TYPE bytea USING convert_to(main_response_encrypted, 'UTF8'),
+    ALTER COLUMN encryption_key_encrypted TYPE bytea USING convert_to(encryption_key_encrypted, 'UTF8');
+
+COMMIT;
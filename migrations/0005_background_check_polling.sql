@@ -0,0 +1,13 @@
+-- Track provider check ids and poll schedule for pending background checks
+BEGIN;
+
+ALTER TABLE expert_profiles
+    ADD COLUMN IF NOT EXISTS background_check_id varchar,
+    ADD COLUMN IF NOT EXISTS background_check_started_at timestamp,
+    ADD COLUMN IF NOT EXISTS background_check_next_poll_at timestamp;
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_expert_profiles_background_check_due
+    ON expert_profiles (background_check_next_poll_at)
+    WHERE background_check_status = 'pending';
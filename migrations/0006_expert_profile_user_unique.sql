@@ -0,0 +1,6 @@
+-- One expert profile per user, so logins can upsert with ON CONFLICT (user_id).
+-- Fails if concurrent logins already created duplicates; find them with
+--   SELECT user_id, count(*) FROM expert_profiles GROUP BY user_id HAVING count(*) > 1;
+-- and merge them before running this.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_expert_profiles_user_id
+    ON expert_profiles (user_id);
@@ -0,0 +1,17 @@
+-- Durable job queue polled by app.services.job_queue workers
+CREATE TABLE IF NOT EXISTS jobs (
+    id uuid PRIMARY KEY,
+    task varchar NOT NULL,
+    payload json NOT NULL DEFAULT '{}',
+    status varchar NOT NULL DEFAULT 'queued',
+    attempts integer NOT NULL DEFAULT 0,
+    max_attempts integer NOT NULL DEFAULT 5,
+    run_at timestamp NOT NULL DEFAULT now(),
+    locked_until timestamp,
+    idempotency_key varchar UNIQUE,
+    last_error text,
+    created_at timestamp,
+    updated_at timestamp
+);
+
+CREATE INDEX IF NOT EXISTS ix_jobs_status_run_at ON jobs (status, run_at);
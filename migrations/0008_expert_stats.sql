@@ -0,0 +1,41 @@
+-- Incremental expert dashboard counters and the source columns reconcile reads
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS expert_stats (
+    expert_id uuid PRIMARY KEY REFERENCES users (id),
+    total_questions_answered integer NOT NULL DEFAULT 0,
+    average_rating double precision NOT NULL DEFAULT 0,
+    rating_count integer NOT NULL DEFAULT 0,
+    total_earnings double precision NOT NULL DEFAULT 0,
+    current_match_requests integer NOT NULL DEFAULT 0,
+    active_sessions integer NOT NULL DEFAULT 0,
+    updated_at timestamp
+);
+
+-- Earnings are fixed when a session closes; ratings are given afterwards by the client
+ALTER TABLE sessions
+    ADD COLUMN IF NOT EXISTS earnings double precision,
+    ADD COLUMN IF NOT EXISTS rating double precision;
+
+-- Sessions closed before this migration: best estimate is the current rate
+UPDATE sessions s
+SET earnings = extract(epoch FROM s.ended_at - s.created_at) / 3600.0 * coalesce(p.hourly_rate, 0)
+FROM expert_profiles p
+WHERE p.user_id = s.expert_id
+  AND s.status = 'completed'
+  AND s.ended_at IS NOT NULL
+  AND s.earnings IS NULL;
+
+CREATE TABLE IF NOT EXISTS match_requests (
+    id uuid PRIMARY KEY,
+    question_id uuid NOT NULL REFERENCES questions (id),
+    expert_id uuid NOT NULL REFERENCES users (id),
+    status varchar NOT NULL DEFAULT 'pending',
+    created_at timestamp,
+    updated_at timestamp,
+    CONSTRAINT uq_match_requests_question_expert UNIQUE (question_id, expert_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_match_requests_expert_id ON match_requests (expert_id);
+
+COMMIT;
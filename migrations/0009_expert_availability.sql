@@ -0,0 +1,11 @@
+-- Weekly availability windows read by the schedule-aware matching index
+CREATE TABLE IF NOT EXISTS expert_availability (
+    id uuid PRIMARY KEY,
+    expert_id uuid NOT NULL REFERENCES expert_profiles (id),
+    day_of_week integer NOT NULL,
+    start_time varchar NOT NULL,
+    end_time varchar NOT NULL,
+    timezone varchar NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_expert_availability_expert_id ON expert_availability (expert_id);
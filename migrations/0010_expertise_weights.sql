@@ -0,0 +1,2 @@
+-- Optional per-tag weights used by the expert scoring engine
+ALTER TABLE expert_profiles ADD COLUMN IF NOT EXISTS expertise_weights json;